@@ -0,0 +1,145 @@
+import time
+from typing import Callable, Dict, List, Optional
+from langchain_core.messages import AIMessage
+from result_encoding import LinkExpander
+from config import (
+    STREAM_FLUSH_MODE, STREAM_FLUSH_MAX_CHARS, STREAM_FLUSH_MAX_DELAY_SECONDS, STREAM_SQL_CHUNK_SIZE
+)
+
+THINK_OPEN = "<think>"
+THINK_CLOSE = "</think>"
+
+WORD_BOUNDARY = set(".,!?") | set(" \t\n")
+SENTENCE_END = set(".!?\n")
+
+def chunk_text(chunk) -> str:
+    """Text of one streamed LLM chunk (message chunk or plain string)."""
+    if isinstance(chunk, AIMessage):
+        return chunk.content
+    return str(chunk)
+
+def _partial_tag(data: str, tag: str) -> int:
+    """Length of the longest suffix of `data` that could be the start of `tag`."""
+    for length in range(min(len(tag) - 1, len(data)), 0, -1):
+        if data.endswith(tag[:length]):
+            return length
+    return 0
+
+class ThinkFilter:
+    """
+    Drops <think>...</think> blocks from a token stream. Tags may be split
+    across chunks and may share a chunk with answer text; at most a tag's
+    length of text is held back while it could still be the start of one.
+    """
+
+    def __init__(self):
+        self.thinking = False
+        self._pending = ""
+
+    def feed(self, text: str) -> str:
+        data = self._pending + text
+        self._pending = ""
+        output = []
+        while data:
+            tag = THINK_CLOSE if self.thinking else THINK_OPEN
+            index = data.find(tag)
+            if index >= 0:
+                if not self.thinking:
+                    output.append(data[:index])
+                data = data[index + len(tag):]
+                self.thinking = not self.thinking
+                continue
+
+            keep = _partial_tag(data, tag)
+            if not self.thinking:
+                output.append(data[:len(data) - keep])
+            self._pending = data[len(data) - keep:]
+            break
+        return "".join(output)
+
+    def finish(self) -> str:
+        """Held-back text that turned out not to be a tag."""
+        pending, self._pending = self._pending, ""
+        return "" if self.thinking else pending
+
+class FlushBuffer:
+    """
+    Groups answer text into SSE events. Flushes at the end of a word
+    ("word") or sentence ("sentence"), or once `max_chars` are buffered or
+    the oldest buffered text is `max_delay` seconds old. Each token only
+    looks at its own last character, so the cost per token is constant.
+    """
+
+    def __init__(self, mode: str = STREAM_FLUSH_MODE, max_chars: int = STREAM_FLUSH_MAX_CHARS,
+                 max_delay: float = STREAM_FLUSH_MAX_DELAY_SECONDS, clock: Callable[[], float] = time.monotonic):
+        if mode not in ("word", "sentence"):
+            raise ValueError(f"Unknown flush mode: {mode}")
+        self.mode = mode
+        self.boundary = WORD_BOUNDARY if mode == "word" else SENTENCE_END
+        self.max_chars = max_chars
+        self.max_delay = max_delay
+        self.clock = clock
+        self._parts: List[str] = []
+        self._size = 0
+        self._started = 0.0
+
+    def feed(self, text: str) -> Optional[str]:
+        """Add text; returns the content to send when a flush is due."""
+        if not text:
+            return None
+        if not self._parts:
+            self._started = self.clock()
+        self._parts.append(text)
+        self._size += len(text)
+
+        # A sentence end may be followed by a space in the same token
+        last = text[-1] if self.mode == "word" else text.rstrip(" \t")[-1:]
+        if (last in self.boundary or self._size >= self.max_chars
+                or self.clock() - self._started >= self.max_delay):
+            return self.flush()
+        return None
+
+    def flush(self) -> Optional[str]:
+        """Buffered content, or None while it is only whitespace (which is
+        kept so the spaces between words are not lost)."""
+        content = "".join(self._parts)
+        if not content.strip():
+            return None
+        self._parts = []
+        self._size = 0
+        return content
+
+class AnswerStream:
+    """
+    Think-block stripping, link reference expansion (see result_encoding)
+    and flush grouping, fed one LLM chunk at a time.
+    """
+
+    def __init__(self, links: Optional[Dict[str, str]] = None, **flush_options):
+        self.think_filter = ThinkFilter()
+        self.link_expander = LinkExpander(links or {})
+        self.buffer = FlushBuffer(**flush_options)
+        self._answer_started = False
+
+    def _emit(self, content: Optional[str]) -> Optional[str]:
+        # The answer usually follows the think block after a blank line
+        if content and not self._answer_started:
+            content = content.lstrip()
+            self._answer_started = True
+        return content or None
+
+    def feed(self, chunk) -> Optional[str]:
+        text = self.link_expander.feed(self.think_filter.feed(chunk_text(chunk)))
+        return self._emit(self.buffer.feed(text))
+
+    def finish(self) -> Optional[str]:
+        """Whatever is still buffered once the LLM stream has ended."""
+        text = self.link_expander.feed(self.think_filter.finish()) + self.link_expander.finish()
+        flushed = self.buffer.feed(text) or ""
+        return self._emit(flushed + (self.buffer.flush() or ""))
+
+def sql_chunks(query: str, chunk_size: Optional[int] = STREAM_SQL_CHUNK_SIZE) -> List[str]:
+    """The SQL as one event, or in `chunk_size` pieces when pacing is configured."""
+    if not chunk_size:
+        return [query]
+    return [query[i:i + chunk_size] for i in range(0, len(query), chunk_size)]
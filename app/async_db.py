@@ -0,0 +1,70 @@
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Tuple
+from sqlalchemy import create_engine, event, text
+from snapshot import enable_mmap
+from config import URL, DB_MAX_CONCURRENCY, DB_QUERY_TIMEOUT_SECONDS, FLIGHTS_SNAPSHOT, SNAPSHOT_MMAP_BYTES
+
+# Separate pool of read-only connections for LLM-generated queries; the
+# writer connection in config.engine is only used by startup migrations.
+readonly_engine = create_engine(
+    URL,
+    pool_size=DB_MAX_CONCURRENCY,
+    max_overflow=0,
+    connect_args={'check_same_thread': False},
+)
+
+@event.listens_for(readonly_engine, "connect")
+def _set_readonly_pragmas(dbapi_connection, _connection_record):
+    cursor = dbapi_connection.cursor()
+    cursor.execute("PRAGMA query_only = ON")
+    cursor.close()
+
+if FLIGHTS_SNAPSHOT:
+    enable_mmap(readonly_engine, SNAPSHOT_MMAP_BYTES)
+
+# Instructions SQLite executes between deadline checks
+PROGRESS_INTERVAL = 10000
+
+_executor = ThreadPoolExecutor(max_workers=DB_MAX_CONCURRENCY, thread_name_prefix="sqlite")
+_semaphore = None
+
+def _fetch(query: str, deadline: float) -> Tuple[List[str], List[tuple]]:
+    with readonly_engine.connect() as conn:
+        raw_connection = conn.connection.dbapi_connection
+        # Returning True from the handler makes SQLite abort the statement
+        raw_connection.set_progress_handler(lambda: time.monotonic() > deadline, PROGRESS_INTERVAL)
+        try:
+            result = conn.execute(text(query))
+            return list(result.keys()), [tuple(row) for row in result]
+        finally:
+            raw_connection.set_progress_handler(None, 0)
+
+async def run_query(query: str, timeout: float = DB_QUERY_TIMEOUT_SECONDS) -> Tuple[List[str], List[tuple]]:
+    """
+    Run a read-only query on a worker thread and return column names and rows.
+
+    At most DB_MAX_CONCURRENCY queries run at once; the rest wait their turn
+    without blocking the event loop. Raises TimeoutError when the query has
+    not finished (including time spent waiting) within `timeout` seconds.
+    """
+    global _semaphore
+    if _semaphore is None:
+        _semaphore = asyncio.Semaphore(DB_MAX_CONCURRENCY)
+
+    deadline = time.monotonic() + timeout
+    try:
+        await asyncio.wait_for(_semaphore.acquire(), timeout)
+    except asyncio.TimeoutError as e:
+        raise TimeoutError(f"Query timed out after {timeout}s waiting for a connection") from e
+
+    try:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(_executor, _fetch, query, deadline)
+    except Exception as e:
+        if time.monotonic() > deadline and "interrupted" in str(e):
+            raise TimeoutError(f"Query timed out after {timeout}s") from e
+        raise
+    finally:
+        _semaphore.release()
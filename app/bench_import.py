@@ -0,0 +1,59 @@
+"""
+Measure how long `import main` takes in a fresh interpreter, i.e. the part
+of an API worker's cold start spent before it can serve anything, and fail
+when it exceeds a budget so a slow top-level import is caught in CI.
+
+With --top, also list the modules with the largest cumulative import time
+(from python -X importtime) to show where the time goes.
+
+Usage:
+    python3 app/bench_import.py --runs 5 --budget 1.5 --top 10
+"""
+import argparse
+import os
+import subprocess
+import sys
+
+APP_DIR = os.path.dirname(os.path.abspath(__file__))
+TIMED_IMPORT = "import time; start = time.perf_counter(); import {module}; print(time.perf_counter() - start)"
+
+def time_import(module: str) -> float:
+    result = subprocess.run([sys.executable, "-c", TIMED_IMPORT.format(module=module)],
+                            cwd=APP_DIR, capture_output=True, text=True, check=True)
+    return float(result.stdout.strip().splitlines()[-1])
+
+def slowest_imports(module: str, top: int):
+    """(cumulative seconds, module name) of the slowest imports, slowest first."""
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"],
+                            cwd=APP_DIR, capture_output=True, text=True, check=True)
+    timings = []
+    for line in result.stderr.splitlines():
+        fields = line.split("|")
+        if len(fields) == 3 and fields[1].strip().isdigit():
+            timings.append((int(fields[1]) / 1e6, fields[2].strip()))
+    return sorted(timings, reverse=True)[:top]
+
+def main():
+    parser = argparse.ArgumentParser(description="Time the API module import against a budget")
+    parser.add_argument('--module', default='main', help="Module to import")
+    parser.add_argument('--runs', type=int, default=5, help="Fresh interpreters to time; the best is reported")
+    parser.add_argument('--budget', type=float, default=1.5, help="Maximum import time in seconds")
+    parser.add_argument('--top', type=int, default=0, help="Also list this many slowest imports")
+    args = parser.parse_args()
+
+    times = [time_import(args.module) for _ in range(args.runs)]
+    best = min(times)
+    print(f"import {args.module}: best {best * 1000:.0f} ms, worst {max(times) * 1000:.0f} ms "
+          f"over {args.runs} runs (budget {args.budget * 1000:.0f} ms)")
+
+    if args.top:
+        print("\ncumulative ms  module")
+        for seconds, name in slowest_imports(args.module, args.top):
+            print(f"{seconds * 1000:13.0f}  {name}")
+
+    if best > args.budget:
+        print(f"\nOver budget by {(best - args.budget) * 1000:.0f} ms")
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
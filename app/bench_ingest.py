@@ -0,0 +1,71 @@
+"""
+Benchmark the ORM loader (json_to_sqlite) against the bulk upsert loader
+(bulk_load_flights) and report rows/sec for each.
+
+Usage:
+    python3 app/bench_ingest.py --scale 20 --batch-size 1000
+"""
+import argparse
+import json
+import os
+import tempfile
+import time
+import uuid
+from contextlib import redirect_stdout
+from io import StringIO
+from pathlib import Path
+from database import json_to_sqlite, bulk_load_flights, BULK_BATCH_SIZE
+
+DEFAULT_JSON = Path(__file__).parent.parent / 'data' / 'flight_data.json'
+
+def build_dataset(source, scale, target_dir):
+    """Replicate the sample dump `scale` times with fresh uuids."""
+    with open(source, 'r', encoding='utf-8') as file:
+        records = json.load(file)
+
+    scaled = []
+    for _ in range(scale):
+        for record in records:
+            scaled.append({**record, 'uuid': str(uuid.uuid4())})
+
+    path = os.path.join(target_dir, 'flight_data.json')
+    with open(path, 'w', encoding='utf-8') as file:
+        json.dump(scaled, file)
+    return path, len(scaled)
+
+def time_loader(name, loader, json_file, sqlite_file, row_count):
+    start = time.perf_counter()
+    with redirect_stdout(StringIO()):
+        loader(json_file, sqlite_file)
+    elapsed = time.perf_counter() - start
+    print(f"{name:<10} {row_count:>9} rows  {elapsed:8.3f}s  {row_count / elapsed:>12,.0f} rows/sec")
+    return elapsed
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark flight data ingestion")
+    parser.add_argument('--json', default=str(DEFAULT_JSON), help="Source flight JSON dump")
+    parser.add_argument('--scale', type=int, default=10, help="Times to replicate the dump")
+    parser.add_argument('--batch-size', type=int, default=BULK_BATCH_SIZE)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        json_file, row_count = build_dataset(args.json, args.scale, tmp)
+
+        orm = time_loader('orm', json_to_sqlite, json_file,
+                          os.path.join(tmp, 'orm.db'), row_count)
+        bulk = time_loader(
+            'bulk',
+            lambda src, dst: bulk_load_flights(src, dst, batch_size=args.batch_size),
+            json_file, os.path.join(tmp, 'bulk.db'), row_count
+        )
+        # Reloading the same dump exercises the ON CONFLICT update path
+        time_loader(
+            'bulk-rerun',
+            lambda src, dst: bulk_load_flights(src, dst, batch_size=args.batch_size),
+            json_file, os.path.join(tmp, 'bulk.db'), row_count
+        )
+
+    print(f"speedup    {orm / bulk:.1f}x")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,215 @@
+"""
+Offline load test of the /stream endpoint. The LLMs are replaced by the
+FAKE provider (fake_llm.FakeChatModel) with a fixed latency and token rate,
+policy embeddings by the local hashing embedder, and flights are served
+from a snapshot built into a temporary directory, so runs need no API keys
+and are comparable from one to the next.
+
+The readme prompt catalog (plus any --questions file of JSON lines with a
+"question" field) is replayed --rounds times by --concurrency clients
+against an in-process uvicorn server, or against --url. Reports latency
+and time to first event percentiles, requests/sec and error counts. Save a
+run with --output and compare a later one to it with --baseline.
+
+LLM gate limits are lifted for the fake models unless --production-limits
+applies those of the Groq models they stand in for.
+
+Usage:
+    python3 app/bench_load.py --concurrency 16 --rounds 3 --llm-latency 0.3 --tokens-per-second 200
+"""
+import argparse
+import asyncio
+import json
+import os
+import socket
+import tempfile
+import time
+from contextlib import redirect_stdout
+from io import StringIO
+from pathlib import Path
+from typing import Dict, List, NamedTuple, Optional
+import httpx
+from bench_ingest import DEFAULT_JSON
+from bench_query_validator import readme_prompts
+from snapshot import build_snapshot
+
+# Gate limits (requests/second, burst, concurrency, queue) no load test reaches
+UNLIMITED = 1_000_000
+
+class Result(NamedTuple):
+    question: str
+    status: int
+    latency: float
+    first_event: Optional[float]
+    events: int
+    error_events: int
+
+def load_questions(path: Optional[str]) -> List[str]:
+    questions = readme_prompts()
+    if path:
+        with open(path, encoding='utf-8') as file:
+            for line in file:
+                if line.strip():
+                    question = json.loads(line).get("question")
+                    if question:
+                        questions.append(question)
+    return questions
+
+def percentile(values: List[float], fraction: float) -> float:
+    """Nearest-rank percentile."""
+    if not values:
+        return float("nan")
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, max(0, round(fraction * len(ordered)) - 1))]
+
+async def fetch(client: httpx.AsyncClient, url: str, question: str) -> Result:
+    start = time.perf_counter()
+    first_event = None
+    events = errors = 0
+    async with client.stream("GET", f"{url}/stream", params={"question": question}) as response:
+        async for line in response.aiter_lines():
+            if not line.startswith("data:"):
+                continue
+            if first_event is None:
+                first_event = time.perf_counter() - start
+            events += 1
+            if json.loads(line[len("data:"):]).get("type") == "error":
+                errors += 1
+        return Result(question, response.status_code, time.perf_counter() - start, first_event, events, errors)
+
+async def replay(url: str, questions: List[str], concurrency: int, timeout: float):
+    queue: "asyncio.Queue[str]" = asyncio.Queue()
+    for question in questions:
+        queue.put_nowait(question)
+    results: List[Result] = []
+
+    async def client_loop(client: httpx.AsyncClient):
+        while not queue.empty():
+            question = queue.get_nowait()
+            try:
+                results.append(await fetch(client, url, question))
+            except httpx.HTTPError as e:
+                print(f"request failed ({type(e).__name__}): {question[:60]}")
+                results.append(Result(question, 0, timeout, None, 0, 0))
+
+    limits = httpx.Limits(max_connections=concurrency)
+    async with httpx.AsyncClient(timeout=timeout, limits=limits) as client:
+        start = time.perf_counter()
+        await asyncio.gather(*(client_loop(client) for _ in range(concurrency)))
+        elapsed = time.perf_counter() - start
+    return results, elapsed
+
+def summarize(results: List[Result], elapsed: float) -> Dict[str, float]:
+    ok = [result for result in results if result.status == 200]
+    latencies = [result.latency * 1000 for result in ok]
+    first_events = [result.first_event * 1000 for result in ok if result.first_event is not None]
+    summary = {
+        "requests": len(results),
+        "rps": len(results) / elapsed,
+        "rejected": sum(1 for result in results if result.status == 503),
+        "failed": sum(1 for result in results if result.status not in (200, 503)),
+        "error_events": sum(result.error_events for result in ok),
+    }
+    for name, values in (("latency", latencies), ("first_event", first_events)):
+        for label, fraction in (("p50", 0.50), ("p95", 0.95), ("p99", 0.99)):
+            summary[f"{name}_{label}_ms"] = percentile(values, fraction)
+    return summary
+
+def report(summary: Dict[str, float], baseline: Optional[Dict[str, float]]) -> None:
+    print(f"\n{'metric':22}{'value':>12}" + (f"{'baseline':>12}{'change':>10}" if baseline else ""))
+    for key, value in summary.items():
+        line = f"{key:22}{value:12.1f}"
+        if baseline and key in baseline:
+            before = baseline[key]
+            change = f"{(value - before) / before:+.1%}" if before else ""
+            line += f"{before:12.1f}{change:>10}"
+        print(line)
+
+def start_fake_environment(args, workdir: Path) -> None:
+    """Point config at the fake providers and a fresh snapshot; must run before main is imported."""
+    with redirect_stdout(StringIO()):
+        snapshot = build_snapshot(args.json, workdir / "snapshots")
+    os.environ.update({
+        "LLM_PLATFORM": "FAKE",
+        "FAKE_LLM_LATENCY": str(args.llm_latency),
+        "FAKE_LLM_TOKEN_DELAY": str(1 / args.tokens_per_second if args.tokens_per_second else 0),
+        "FLIGHTS_SNAPSHOT": str(snapshot),
+        "WARM_UP": "1",
+    })
+    # The SQL cache and embedding cache are relative paths: start both empty
+    os.chdir(workdir)
+
+def lift_gate_limits(gateway, production: bool) -> None:
+    from config import LLM_LIMITS
+    for name, gate in gateway.gates.items():
+        limits = LLM_LIMITS.get(name.replace("FAKE:", "GROQ:", 1)) if production else None
+        if limits:
+            gate.rate = limits["requests_per_minute"] / 60
+            gate.capacity = gate.max_concurrency = limits["max_concurrency"]
+        elif not production:
+            gate.rate = gate.capacity = gate.max_concurrency = gate.max_queue = UNLIMITED
+
+async def serve_and_replay(args, questions: List[str]):
+    # Imported only now: config reads the environment set up above
+    import uvicorn
+    import main
+    import vector_db
+    from config import llm_gateway
+    from vector_index import HashingEmbeddingBackend
+
+    vector_db.embedding_backend = HashingEmbeddingBackend()
+    lift_gate_limits(llm_gateway, args.production_limits)
+
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        port = sock.getsockname()[1]
+    server = uvicorn.Server(uvicorn.Config(main.app, host="127.0.0.1", port=port, log_level="warning"))
+    server_task = asyncio.create_task(server.serve())
+    while not server.started:
+        await asyncio.sleep(0.05)
+    try:
+        return await replay(f"http://127.0.0.1:{port}", questions, args.concurrency, args.timeout)
+    finally:
+        server.should_exit = True
+        await server_task
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline load test of /stream with fake LLMs")
+    parser.add_argument('--url', help="Load test a running server instead of an in-process one")
+    parser.add_argument('--json', default=str(DEFAULT_JSON), help="Source flight JSON dump")
+    parser.add_argument('--questions', help="Extra questions: JSON lines with a \"question\" field")
+    parser.add_argument('--concurrency', type=int, default=8, help="Concurrent clients")
+    parser.add_argument('--rounds', type=int, default=1, help="Times the question list is replayed")
+    parser.add_argument('--llm-latency', type=float, default=0.2, help="Fake LLM seconds before the first token")
+    parser.add_argument('--tokens-per-second', type=float, default=100, help="Fake LLM streaming rate (0: instant)")
+    parser.add_argument('--production-limits', action='store_true',
+                        help="Apply the Groq rate and concurrency limits to the fake models")
+    parser.add_argument('--timeout', type=float, default=60, help="Per-request timeout in seconds")
+    parser.add_argument('--output', help="Write the summary as JSON for later --baseline comparison")
+    parser.add_argument('--baseline', help="Summary JSON from an earlier run to compare against")
+    args = parser.parse_args()
+
+    questions = load_questions(args.questions) * args.rounds
+    baseline = json.loads(Path(args.baseline).read_text(encoding='utf-8')) if args.baseline else None
+    output = Path(args.output).absolute() if args.output else None
+
+    print(f"{len(questions)} requests, concurrency {args.concurrency}")
+    if args.url:
+        results, elapsed = asyncio.run(replay(args.url.rstrip('/'), questions, args.concurrency, args.timeout))
+    else:
+        with tempfile.TemporaryDirectory() as tmp:
+            cwd = os.getcwd()
+            args.json = str(Path(args.json).absolute())
+            start_fake_environment(args, Path(tmp))
+            try:
+                results, elapsed = asyncio.run(serve_and_replay(args, questions))
+            finally:
+                os.chdir(cwd)
+
+    summary = summarize(results, elapsed)
+    report(summary, baseline)
+    if output:
+        output.write_text(json.dumps(summary, indent=2), encoding='utf-8')
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+"""
+Benchmark result handling for query execution: SQLDatabase.run followed by
+parse_tuple_list (string round-trip) against fetch_rows (typed rows).
+
+Usage:
+    python3 app/bench_query_rows.py --scale 20 --limit 10000
+"""
+import argparse
+import os
+import tempfile
+import time
+import tracemalloc
+from contextlib import redirect_stdout
+from io import StringIO
+from sqlalchemy import create_engine
+from langchain_community.utilities import SQLDatabase
+from bench_ingest import DEFAULT_JSON, build_dataset
+from database import bulk_load_flights
+from util import parse_tuple_list, fetch_rows
+
+QUERY = (
+    "SELECT uuid, airline, date, duration, flightType, price_inr, origin, destination, "
+    "link, rainProbability, freeMeal FROM flights ORDER BY price_inr ASC LIMIT {limit}"
+)
+
+def measure(name, run, repeat):
+    tracemalloc.start()
+    start = time.perf_counter()
+    for _ in range(repeat):
+        rows = run()
+    elapsed = (time.perf_counter() - start) / repeat
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"{name:<18} {len(rows):>7} rows  {elapsed * 1000:9.1f} ms/query  peak {peak / 1e6:8.1f} MB")
+    return rows, elapsed
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark query result handling")
+    parser.add_argument('--json', default=str(DEFAULT_JSON), help="Source flight JSON dump")
+    parser.add_argument('--scale', type=int, default=10, help="Times to replicate the dump")
+    parser.add_argument('--limit', type=int, default=10000, help="Rows returned per query")
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        json_file, _ = build_dataset(args.json, args.scale, tmp)
+        sqlite_file = os.path.join(tmp, 'flights.db')
+        with redirect_stdout(StringIO()):
+            bulk_load_flights(json_file, sqlite_file)
+
+        engine = create_engine(f'sqlite:///{sqlite_file}')
+        db = SQLDatabase(engine)
+        query = QUERY.format(limit=args.limit)
+
+        string_rows, string_time = measure(
+            'run+literal_eval', lambda: parse_tuple_list(db.run(query)), args.repeat)
+        typed_rows, typed_time = measure(
+            'fetch_rows', lambda: fetch_rows(engine, query)[1], args.repeat)
+        engine.dispose()
+
+    altered = sum(1 for a, b in zip(string_rows, typed_rows) if a != b)
+    print(f"speedup            {string_time / typed_time:.1f}x")
+    print(f"rows altered by the string path: {altered}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+"""
+Benchmark intent classification: the difflib scan over every keyword
+(one pass per intent) against the precomputed character index and word
+cache in query_validator.classify_query. Also checks that both agree.
+
+Usage:
+    python3 app/bench_query_validator.py --repeat 20
+"""
+import argparse
+import random
+import re
+import time
+from pathlib import Path
+import query_validator
+from query_validator import (
+    FLIGHT_KEYWORDS, LUGGAGE_KEYWORDS, LOCATION_INDICATORS, PRICE_SYMBOLS,
+    classify_query, get_fuzzy_matches
+)
+
+README = Path(__file__).parent.parent / 'readme.md'
+
+LUGGAGE_QUESTIONS = [
+    "Cheapest flight from New Delhi to Hanoi and what is the cabin baggage allowance?",
+    "Can I bring a 25kg suitcase on IndiGo from Mumbai to Ho Chi Minh City?",
+    "What is the checked luggage weight limit for VietJet flights to Da Nang?",
+    "Are power banks prohibited in hand baggage on flights from Kolkata to Hanoi?",
+    "Excess baggage charges for a trip from Ahmedabad to Hanoi",
+]
+
+def difflib_intents(query: str):
+    """The original per-intent difflib checks, kept as the baseline."""
+    query = query.lower().strip()
+    words = query.split()
+    flight = any(word in LOCATION_INDICATORS or get_fuzzy_matches(word, FLIGHT_KEYWORDS) for word in words) \
+        or any(symbol in query for symbol in PRICE_SYMBOLS)
+    luggage = any(get_fuzzy_matches(word, LUGGAGE_KEYWORDS) for word in words)
+    return flight, luggage
+
+def with_typos(question: str, rng: random.Random) -> str:
+    """Swap two adjacent letters in roughly every third word."""
+    words = question.split()
+    for i, word in enumerate(words):
+        if len(word) > 3 and rng.random() < 0.33:
+            j = rng.randrange(len(word) - 1)
+            words[i] = word[:j] + word[j + 1] + word[j] + word[j + 2:]
+    return ' '.join(words)
+
+def readme_prompts():
+    """The example prompts from the readme's prompt tables."""
+    prompts = [line.strip('| ').strip() for line in README.read_text(encoding='utf-8').splitlines()
+               if line.startswith('| ') and not line.startswith('| Prompt') and '|' not in line.strip('| ')]
+    return [prompt for prompt in prompts if prompt and not prompt.startswith('-') and prompt != 'Spec']
+
+def load_corpus(seed: int):
+    corpus = readme_prompts() + LUGGAGE_QUESTIONS
+    rng = random.Random(seed)
+    return corpus + [with_typos(question, rng) for question in corpus]
+
+def time_per_question(classify, corpus, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for question in corpus:
+            classify(question)
+    return (time.perf_counter() - start) / (repeat * len(corpus))
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark query intent classification")
+    parser.add_argument('--repeat', type=int, default=20)
+    parser.add_argument('--seed', type=int, default=7)
+    args = parser.parse_args()
+
+    corpus = load_corpus(args.seed)
+
+    start = time.perf_counter()
+    query_validator.keyword_index()
+    build = time.perf_counter() - start
+
+    def cold(question):
+        query_validator.classify_word.cache_clear()
+        return classify_query(question)
+
+    baseline = time_per_question(difflib_intents, corpus, args.repeat)
+    uncached = time_per_question(cold, corpus, args.repeat)
+    time_per_question(classify_query, corpus, 1)
+    cached = time_per_question(classify_query, corpus, args.repeat)
+
+    disagreements = [question for question in corpus if tuple(classify_query(question)) != difflib_intents(question)]
+    words = {word for question in corpus for word in re.findall(r'\S+', question.lower())}
+    word_disagreements = [word for word in words if tuple(query_validator.classify_word(word)) != (
+        get_fuzzy_matches(word, FLIGHT_KEYWORDS), get_fuzzy_matches(word, LUGGAGE_KEYWORDS))]
+
+    print(f"questions             {len(corpus)}")
+    print(f"index build           {build * 1000:.1f} ms")
+    print(f"difflib               {baseline * 1e6:9.1f} us/question")
+    print(f"index (cold cache)    {uncached * 1e6:9.1f} us/question  {baseline / uncached:5.1f}x")
+    print(f"index (warm cache)    {cached * 1e6:9.1f} us/question  {baseline / cached:5.1f}x")
+    print(f"question disagreements {len(disagreements)}, word disagreements {len(word_disagreements)}")
+    for question in disagreements:
+        print(f"  {question}")
+
+if __name__ == "__main__":
+    main()
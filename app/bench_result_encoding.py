@@ -0,0 +1,82 @@
+"""
+Measure response prompt size with query results embedded as a raw Python
+repr against the compact encoding in result_encoding, for every readme
+prompt. Queries come from the SQL templates where they match, otherwise a
+plain route query on the cities the prompt names.
+
+Tokens are counted with tiktoken (cl100k); with --approx (or when the
+tiktoken encoding cannot be loaded) words and punctuation are counted instead.
+
+Usage:
+    python3 app/bench_result_encoding.py
+"""
+import argparse
+import os
+import tempfile
+from contextlib import redirect_stdout
+from io import StringIO
+from sqlalchemy import create_engine
+from bench_ingest import DEFAULT_JSON
+from bench_query_validator import readme_prompts
+from database import bulk_load_flights
+from normalize_question import normalize_question, question_entities, CITY_TOKENS
+from response_prompt import response_prompt
+from summary_prompt import summary_prompt
+from result_encoding import encode_results
+from sql_templates import COLUMNS, compile_question
+from util import fetch_rows
+
+def token_counter(approx: bool):
+    if not approx:
+        try:
+            from split_document import get_encoder
+            encoder = get_encoder()
+            return lambda text: len(encoder.encode(text)), "tiktoken"
+        except Exception as e:  # pylint: disable=broad-except
+            print(f"tiktoken unavailable ({e}); counting words and punctuation instead")
+    import re
+    return lambda text: len(re.findall(r"\w+|[^\w\s]", text)), "approx"
+
+def query_for(prompt: str):
+    compiled = compile_question(prompt)
+    if compiled:
+        return compiled.render()
+    cities = [token for token in question_entities(normalize_question(prompt)) if token in CITY_TOKENS]
+    names = [city.replace('_', ' ').title() for city in cities]
+    conditions = [f"{column} = '{name}'" for column, name in zip(("origin", "destination"), names)]
+    where = f" WHERE {' AND '.join(conditions)}" if conditions else ""
+    return f"SELECT {COLUMNS} FROM flights{where} ORDER BY price_inr ASC LIMIT 10"
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure response prompt tokens before and after compact encoding")
+    parser.add_argument('--json', default=str(DEFAULT_JSON), help="Source flight JSON dump")
+    parser.add_argument('--approx', action='store_true', help="Approximate token counts without tiktoken")
+    args = parser.parse_args()
+
+    count, method = token_counter(args.approx)
+    totals = [0, 0, 0]
+    with tempfile.TemporaryDirectory() as tmp:
+        sqlite_file = os.path.join(tmp, 'flights.db')
+        with redirect_stdout(StringIO()):
+            bulk_load_flights(args.json, sqlite_file)
+        engine = create_engine(f'sqlite:///{sqlite_file}')
+
+        print(f"tokens ({method})   raw   compact  summary  rows  prompt")
+        for prompt in readme_prompts():
+            query = query_for(prompt)
+            columns, rows = fetch_rows(engine, query)
+            raw = response_prompt.format(question=prompt, sql_query=query, query_result=rows)
+            compact = response_prompt.format(question=prompt, sql_query=query,
+                                             query_result=encode_results(columns, rows).text)
+            summary = summary_prompt.format(question=prompt,
+                                            query_result=encode_results(columns, rows, drop={"uuid", "link"}).text)
+            sizes = [count(raw), count(compact), count(summary)]
+            totals = [total + size for total, size in zip(totals, sizes)]
+            print(f"{'':15}{sizes[0]:6d} {sizes[1]:8d} {sizes[2]:8d} {len(rows):5d}  {prompt[:60]}")
+        engine.dispose()
+
+    print(f"{'total':15}{totals[0]:6d} {totals[1]:8d} {totals[2]:8d}")
+    print(f"compact response prompt: {totals[1] / totals[0]:.1%} of raw; summary prompt: {totals[2] / totals[0]:.1%} of raw")
+
+if __name__ == "__main__":
+    main()
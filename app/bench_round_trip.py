@@ -0,0 +1,71 @@
+"""
+Benchmark round-trip search: the self-join an LLM writes for "cheapest
+return flight with at least N days gap" against round_trip.RoundTripIndex,
+on the sample dump replicated --scale times. Checks both return the same
+totals and reports the time per query (plus the one-off index build).
+
+Usage:
+    python3 app/bench_round_trip.py --scale 20 --gap 7 --limit 10
+"""
+import argparse
+import os
+import sqlite3
+import tempfile
+import time
+from contextlib import redirect_stdout
+from io import StringIO
+from bench_ingest import DEFAULT_JSON, build_dataset
+from database import bulk_load_flights, migrate_flights_schema
+from round_trip import RoundTripIndex, RoundTripQuery, SOURCE_SQL
+
+SELF_JOIN_SQL = """
+SELECT o.price_inr + r.price_inr AS total_price_inr
+FROM flights o JOIN flights r ON r.origin = o.destination AND r.destination = o.origin
+WHERE o.origin = ? AND o.destination = ? AND r.date_ordinal - o.date_ordinal >= ?
+ORDER BY total_price_inr ASC LIMIT ?
+"""
+
+def per_query(function, repeat: int) -> float:
+    start = time.perf_counter()
+    for _ in range(repeat):
+        result = function()
+    return (time.perf_counter() - start) / repeat, result
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark self-join vs indexed round-trip search")
+    parser.add_argument('--json', default=str(DEFAULT_JSON), help="Source flight JSON dump")
+    parser.add_argument('--scale', type=int, default=10, help="Times to replicate the dump")
+    parser.add_argument('--gap', type=int, default=7, help="Minimum days between outbound and return")
+    parser.add_argument('--limit', type=int, default=10, help="Round trips returned per query")
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        json_file, row_count = build_dataset(args.json, args.scale, tmp)
+        sqlite_file = os.path.join(tmp, 'flights.db')
+        with redirect_stdout(StringIO()):
+            bulk_load_flights(json_file, sqlite_file)
+            migrate_flights_schema(sqlite_file)
+
+        connection = sqlite3.connect(sqlite_file)
+        cursor = connection.execute(SOURCE_SQL)
+        columns = [description[0] for description in cursor.description]
+        start = time.perf_counter()
+        index = RoundTripIndex(columns, cursor.fetchall())
+        print(f"{row_count} rows; index built in {(time.perf_counter() - start) * 1000:.1f} ms\n")
+
+        print(f"{'route':36}{'self-join ms':>14}{'index ms':>10}{'speedup':>9}  same")
+        for origin, destination in sorted(index.routes):
+            if (destination, origin) not in index.routes:
+                continue
+            query = RoundTripQuery(origin, destination, args.gap, None, args.limit)
+            join_time, join_totals = per_query(lambda: [row[0] for row in connection.execute(
+                SELF_JOIN_SQL, (origin, destination, args.gap, args.limit))], args.repeat)
+            index_time, pairs = per_query(lambda: index.search(query), args.repeat)
+            same = join_totals == [pair[-1] for pair in pairs]
+            print(f"{origin + ' -> ' + destination:36}{join_time * 1000:14.2f}{index_time * 1000:10.3f}"
+                  f"{join_time / index_time:8.0f}x  {'yes' if same else 'NO'}")
+        connection.close()
+
+if __name__ == "__main__":
+    main()
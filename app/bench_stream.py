@@ -0,0 +1,138 @@
+"""
+Benchmark the answer stream: the original per-chunk <think> check and
+regex flush against answer_stream.AnswerStream, on synthetic token streams.
+
+Reports how often each leaks think text or drops answer text when tags are
+split across chunks, the processing cost per token, and the time to the
+first answer event (SQL streaming plus a fake LLM emitting tokens).
+
+Usage:
+    python3 app/bench_stream.py --streams 500 --token-delay 0.01
+"""
+import argparse
+import asyncio
+import random
+import re
+import time
+from answer_stream import AnswerStream, sql_chunks
+
+SQL = ("SELECT uuid, airline, date, duration, flightType, price_inr, origin, destination, link, "
+       "rainProbability, freeMeal FROM flights WHERE origin = 'New Delhi' AND destination = 'Hanoi' "
+       "ORDER BY price_inr ASC LIMIT 10")
+
+THINK = "<think>The user wants the cheapest flight. Row one is cheapest, so answer with it.</think>"
+ANSWER = ("The cheapest flight from New Delhi to Hanoi is operated by Vietjet on 2025-08-24 for "
+          "8,614 INR. It is a nonstop flight of 4h 5m with a 55% chance of rain and no free meal. "
+          "Book it here: https://www.google.com/travel/flights.")
+
+def tokenize(text: str, rng: random.Random):
+    """Split text into chunks of 1-6 characters, so tags often straddle chunks."""
+    chunks, i = [], 0
+    while i < len(text):
+        size = rng.randint(1, 6)
+        chunks.append(text[i:i + size])
+        i += size
+    return chunks
+
+def legacy_events(chunks):
+    """The original stream_response loop, kept as the baseline."""
+    events, buffer, current_think = [], "", False
+    for content in chunks:
+        if "<think>" in content:
+            current_think = True
+            continue
+        elif "</think>" in content:
+            current_think = False
+            continue
+        if current_think:
+            continue
+        buffer += content
+        if re.search(r'[.,!?\s]$', buffer):
+            if buffer.strip():
+                events.append(buffer)
+            buffer = ""
+    if buffer.strip():
+        events.append(buffer)
+    return events
+
+def stream_events(chunks):
+    answer_stream = AnswerStream(max_delay=float('inf'))
+    events = [content for content in map(answer_stream.feed, chunks) if content]
+    content = answer_stream.finish()
+    return events + [content] if content else events
+
+def check(process, streams):
+    """Number of streams whose joined output differs from the think-free answer."""
+    return sum("".join(process(chunks)) != ANSWER for chunks in streams)
+
+def per_token(process, streams, repeat):
+    tokens = sum(len(chunks) for chunks in streams) * repeat
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for chunks in streams:
+            process(chunks)
+    return (time.perf_counter() - start) / tokens
+
+async def fake_llm(chunks, delay):
+    for chunk in chunks:
+        await asyncio.sleep(delay)
+        yield chunk
+
+async def time_to_first_answer(chunks, delay, legacy):
+    """Seconds from the start of SQL streaming to the first answer event."""
+    start = time.perf_counter()
+    if legacy:
+        for _ in (SQL[i:i + 10] for i in range(0, len(SQL), 10)):
+            await asyncio.sleep(0.05)
+    else:
+        sql_chunks(SQL)
+
+    buffer, current_think = "", False
+    answer_stream = AnswerStream()
+    async for content in fake_llm(chunks, delay):
+        if legacy:
+            if "<think>" in content:
+                current_think = True
+                continue
+            elif "</think>" in content:
+                current_think = False
+                continue
+            if current_think:
+                continue
+            buffer += content
+            if re.search(r'[.,!?\s]$', buffer) and buffer.strip():
+                return time.perf_counter() - start
+        elif answer_stream.feed(content):
+            return time.perf_counter() - start
+    return time.perf_counter() - start
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark answer streaming")
+    parser.add_argument('--streams', type=int, default=500)
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--token-delay', type=float, default=0.01)
+    parser.add_argument('--seed', type=int, default=7)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    streams = [tokenize(THINK + ANSWER, rng) for _ in range(args.streams)]
+    whole_tags = [[THINK] + tokenize(ANSWER, rng) for _ in range(args.streams)]
+
+    print(f"streams {len(streams)}, tokens {sum(len(chunks) for chunks in streams)}")
+    print(f"wrong output, tags split across chunks:  original {check(legacy_events, streams):4d}   "
+          f"AnswerStream {check(stream_events, streams):4d}")
+    print(f"wrong output, tags in one chunk:         original {check(legacy_events, whole_tags):4d}   "
+          f"AnswerStream {check(stream_events, whole_tags):4d}")
+
+    legacy = per_token(legacy_events, streams, args.repeat)
+    current = per_token(stream_events, streams, args.repeat)
+    print(f"processing per token:  original {legacy * 1e6:6.2f} us   AnswerStream {current * 1e6:6.2f} us")
+
+    chunks = [THINK] + tokenize(ANSWER, rng)
+    legacy_ttft = asyncio.run(time_to_first_answer(chunks, args.token_delay, legacy=True))
+    current_ttft = asyncio.run(time_to_first_answer(chunks, args.token_delay, legacy=False))
+    print(f"time to first answer event (SQL + LLM):  original {legacy_ttft * 1000:7.1f} ms   "
+          f"AnswerStream {current_ttft * 1000:7.1f} ms")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+import math
+import re
+from collections import Counter
+from typing import Dict, List, Sequence, Tuple
+
+STOPWORDS = {
+    'a', 'about', 'all', 'am', 'an', 'and', 'any', 'are', 'as', 'at', 'be', 'been',
+    'but', 'by', 'can', 'could', 'do', 'does', 'for', 'from', 'had', 'has', 'have',
+    'how', 'i', 'if', 'in', 'into', 'is', 'it', 'its', 'may', 'me', 'much', 'my',
+    'no', 'not', 'of', 'on', 'or', 'our', 'shall', 'should', 'so', 'than', 'that',
+    'the', 'their', 'them', 'then', 'there', 'these', 'they', 'this', 'those', 'to',
+    'up', 'was', 'we', 'what', 'when', 'where', 'which', 'who', 'will', 'with',
+    'would', 'you', 'your',
+}
+
+def tokenize(text: str) -> List[str]:
+    """Lowercase word tokens without stopwords, with a light plural fold ("bags" -> "bag")."""
+    tokens = []
+    for word in re.findall(r'[a-z0-9]+', text.lower()):
+        if word in STOPWORDS:
+            continue
+        if len(word) > 3 and word.endswith('s') and not word.endswith('ss'):
+            word = word[:-1]
+        tokens.append(word)
+    return tokens
+
+class BM25Index:
+    """Inverted index with Okapi BM25 ranking over a fixed list of passages."""
+
+    def __init__(self, passages: Sequence[str], k1: float = 1.5, b: float = 0.75):
+        self.passages = list(passages)
+        self.k1 = k1
+        self.b = b
+        self.postings: Dict[str, List[Tuple[int, int]]] = {}
+
+        lengths = []
+        for doc_id, passage in enumerate(self.passages):
+            counts = Counter(tokenize(passage))
+            lengths.append(sum(counts.values()))
+            for term, tf in counts.items():
+                self.postings.setdefault(term, []).append((doc_id, tf))
+
+        count = len(self.passages)
+        average = sum(lengths) / count if count else 0.0
+        # Per-document length normalization is fixed, so precompute it
+        self._norms = [k1 * (1 - b + b * length / average) if average else k1 for length in lengths]
+        self.idf = {term: math.log(1 + (count - len(docs) + 0.5) / (len(docs) + 0.5))
+                    for term, docs in self.postings.items()}
+
+    def search(self, query: str, k: int = 3) -> List[Tuple[str, float]]:
+        """Return the top-k (passage, score) pairs, best first."""
+        scores: Dict[int, float] = {}
+        for term in set(tokenize(query)):
+            idf = self.idf.get(term)
+            if idf is None:
+                continue
+            for doc_id, tf in self.postings[term]:
+                scores[doc_id] = scores.get(doc_id, 0.0) + idf * tf * (self.k1 + 1) / (tf + self._norms[doc_id])
+
+        best = sorted(scores.items(), key=lambda item: item[1], reverse=True)[:k]
+        return [(self.passages[doc_id], score) for doc_id, score in best]
+
+def reciprocal_rank_fusion(rankings: Sequence[Sequence[str]], k: int = 60) -> List[str]:
+    """Merge ranked passage lists (e.g. BM25 and vector results) into one ranking."""
+    scores: Dict[str, float] = {}
+    for ranking in rankings:
+        for rank, passage in enumerate(ranking):
+            scores[passage] = scores.get(passage, 0.0) + 1.0 / (k + rank + 1)
+    return sorted(scores, key=scores.get, reverse=True)
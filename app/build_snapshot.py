@@ -0,0 +1,43 @@
+"""
+Build a versioned, indexed, read-only flights snapshot from the JSON dump
+and publish it as the snapshot directory's CURRENT one. Serve it by starting
+the API with FLIGHTS_SNAPSHOT pointing at the directory (or the file).
+
+Usage:
+    python3 app/build_snapshot.py --json data/flight_data.json --out snapshots
+"""
+import argparse
+import time
+from contextlib import redirect_stdout
+from io import StringIO
+from pathlib import Path
+from sqlalchemy import create_engine
+from snapshot import build_snapshot, snapshot_url
+
+DEFAULT_JSON = Path(__file__).parent.parent / 'data' / 'flight_data.json'
+DEFAULT_DIR = Path(__file__).parent.parent / 'snapshots'
+
+def main():
+    parser = argparse.ArgumentParser(description="Build a read-only flights snapshot")
+    parser.add_argument('--json', default=str(DEFAULT_JSON), help="Source flight JSON dump")
+    parser.add_argument('--out', default=str(DEFAULT_DIR), help="Snapshot directory")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    with redirect_stdout(StringIO()):
+        path = build_snapshot(args.json, args.out)
+    elapsed = time.perf_counter() - start
+
+    engine = create_engine(snapshot_url(path))
+    with engine.connect() as conn:
+        meta = dict(conn.exec_driver_sql('SELECT key, value FROM snapshot_meta').fetchall())
+    engine.dispose()
+
+    print(f"snapshot   {path}")
+    print(f"version    {meta['version']} (format {meta['format']}, built {meta['built_at']})")
+    print(f"rows       {meta['rows']}")
+    print(f"size       {path.stat().st_size / 1e6:.1f} MB")
+    print(f"build      {elapsed:.2f} s")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,35 @@
+# Canonical city names served by the flights table
+CITIES = {
+    "New Delhi",
+    "Mumbai",
+    "Bangalore",
+    "Kolkata",
+    "Ahmedabad",
+    "Hanoi",
+    "Ho Chi Minh City",
+    "Da Nang",
+    "Phu Quoc",
+}
+
+# Alternative spellings users type, mapped to the canonical name
+CITY_ALIASES = {
+    "delhi": "New Delhi",
+    "new delhi": "New Delhi",
+    "bombay": "Mumbai",
+    "bom": "Mumbai",
+    "bengaluru": "Bangalore",
+    "bangaluru": "Bangalore",
+    "blr": "Bangalore",
+    "calcutta": "Kolkata",
+    "ccu": "Kolkata",
+    "ha noi": "Hanoi",
+    "ho chi minh": "Ho Chi Minh City",
+    "hcmc": "Ho Chi Minh City",
+    "hcm": "Ho Chi Minh City",
+    "saigon": "Ho Chi Minh City",
+    "sai gon": "Ho Chi Minh City",
+    "sgn": "Ho Chi Minh City",
+    "danang": "Da Nang",
+    "phuquoc": "Phu Quoc",
+    "pqc": "Phu Quoc",
+}
@@ -1,19 +1,139 @@
 import logging
+import os
+from functools import partial
 from llm import get_llm
+from llm_gateway import LLMGateway
+from snapshot import snapshot_url, enable_mmap
 from sqlalchemy import create_engine
-from langchain_community.utilities import SQLDatabase
 
-# LLM setup
-flight_llm = get_llm(model_name='qwen/qwen3-32b', platform_name='GROQ')
-luggage_llm = get_llm(model_name='llama-3.1-8b-instant', platform_name='GROQ')
+# LLM gateway: per provider/model request rate (token bucket; burst defaults to
+# max_concurrency) and calls in flight. Each queue holds at most LLM_MAX_QUEUE
+# calls, and a call that cannot start within LLM_QUEUE_TIMEOUT_SECONDS fails.
+LLM_LIMITS = {
+    'GROQ:qwen/qwen3-32b': {'requests_per_minute': 60, 'max_concurrency': 8},
+    'GROQ:llama-3.1-8b-instant': {'requests_per_minute': 30, 'max_concurrency': 8},
+}
+LLM_DEFAULT_LIMITS = {'requests_per_minute': 30, 'max_concurrency': 4}
+LLM_MAX_QUEUE = 64
+LLM_QUEUE_TIMEOUT_SECONDS = 30
+# /stream answers 503 when this many LLM calls are already waiting
+LLM_ADMISSION_MAX_QUEUED = 32
 
-# Database setup
-URL = 'sqlite:///flights.db'
+llm_gateway = LLMGateway(LLM_LIMITS, LLM_DEFAULT_LIMITS, LLM_MAX_QUEUE, LLM_QUEUE_TIMEOUT_SECONDS)
+
+# LLM setup (LLM_PLATFORM=FAKE swaps in the offline provider). Clients are
+# created on first use; see WARM_UP_ON_STARTUP
+LLM_PLATFORM = os.getenv('LLM_PLATFORM', 'GROQ')
+flight_llm = llm_gateway.wrap(partial(get_llm, model_name='qwen/qwen3-32b', platform_name=LLM_PLATFORM),
+                              LLM_PLATFORM, 'qwen/qwen3-32b')
+luggage_llm = llm_gateway.wrap(partial(get_llm, model_name='llama-3.1-8b-instant', platform_name=LLM_PLATFORM),
+                               LLM_PLATFORM, 'llama-3.1-8b-instant')
+
+# Database setup. With FLIGHTS_SNAPSHOT set to a snapshot from build_snapshot.py
+# (the file, or its directory to serve the CURRENT one) the database is opened
+# read-only, immutable and memory-mapped, and startup does no loading at all.
+FLIGHTS_SNAPSHOT = os.getenv('FLIGHTS_SNAPSHOT')
+SNAPSHOT_MMAP_BYTES = 256 * 1024 * 1024
+URL = snapshot_url(FLIGHTS_SNAPSHOT) if FLIGHTS_SNAPSHOT else 'sqlite:///flights.db'
 engine = create_engine(URL, echo=False)
-db = SQLDatabase(engine)
+if FLIGHTS_SNAPSHOT:
+    enable_mmap(engine, SNAPSHOT_MMAP_BYTES)
+# Only the flights table goes into the schema text (a snapshot also carries its
+# snapshot_meta table), with its indexes so generated SQL can target them
+DB_OPTIONS = {'include_tables': ['flights'], 'indexes_in_table_info': True}
+_db = None
+
+def get_db():
+    """LangChain SQLDatabase over `engine`, reflected on first use."""
+    global _db
+    if _db is None:
+        # langchain_community is slow to import; only the SQL chain needs it
+        from langchain_community.utilities import SQLDatabase
+        _db = SQLDatabase(engine, **DB_OPTIONS)
+    return _db
+
+def refresh_db_schema():
+    """Re-reflect the schema after startup migrations: get_db builds a new SQLDatabase on next use."""
+    global _db
+    _db = None
+
+# Read-only query pool: concurrent queries and per-query timeout
+DB_MAX_CONCURRENCY = 8
+DB_QUERY_TIMEOUT_SECONDS = 10
 
 # Maximum number of SQL generation attempts
 MAX_ATTEMPTS = 3
 
+# Rows requested from the SQL prompt; also the LIMIT added to generated
+# queries that have none
+SQL_TOP_K = 10
+
+# Answer common questions ("cheapest flight from X to Y", "direct flights ...")
+# with SQL compiled from a template instead of the LLM
+SQL_TEMPLATES = True
+
+# Generated SQL is always checked locally (EXPLAIN against the schema, read-only
+# and LIMIT rules, allowed routes). Then: "llm" still asks the LLM verifier,
+# "local_simple" skips it for single-table queries that pass every local check,
+# "local" skips it for any query that passes. Local checks cannot tell whether a
+# query answers the question (e.g. ASC for "most expensive"), so skipping the
+# LLM verifier trades that check for latency and is opt-in
+SQL_VERIFY_POLICY = 'llm'
+
+# Answer round-trip questions with the native search in round_trip.py instead
+# of LLM-written self-joins; a return must be at least this many days after
+# the outbound flight unless the question sets a gap
+ROUND_TRIP_SEARCH = True
+ROUND_TRIP_MIN_GAP_DAYS = 1
+
+# Verified question -> SQL cache (set SQL_CACHE_PATH to None to keep it in memory only)
+SQL_CACHE_PATH = 'sql_cache.db'
+SQL_CACHE_MAX_ENTRIES = 1000
+SQL_CACHE_TTL_SECONDS = 7 * 24 * 60 * 60
+# Near-duplicate lookup: reuse SQL for a question that differs from a cached one
+# only in words that never change the query ("show me", "please") and whose token
+# overlap with it is at least the threshold
+SQL_CACHE_FUZZY = False
+SQL_CACHE_FUZZY_THRESHOLD = 0.8
+
+# Policy retrieval: embedding backend ("openai" or the offline "hashing" embedder),
+# texts per embedding request, ranking ("bm25", "vector" or "hybrid") and number
+# of passages passed to the luggage LLM
+EMBEDDING_BACKEND = 'openai'
+EMBEDDING_BATCH_SIZE = 100
+POLICY_RETRIEVAL = 'hybrid'
+POLICY_TOP_K = 3
+# Policy documents and embedding cache registered by ingest_policies.py; when
+# the file is missing the server uses its built-in IndiGo and VietJet documents
+POLICY_DOCUMENTS_PATH = 'policy_documents.json'
+
+# "cards": flight cards are rendered locally from the rows and the LLM only
+# writes the summary; "llm": the LLM formats the whole answer
+RESPONSE_MODE = 'cards'
+
+# Concurrent /stream requests for the same (normalized) question share one pipeline run
+STREAM_COALESCING = True
+
+# Answer streaming: flush at each "word" or "sentence" end, or sooner once this
+# many characters are buffered or the oldest buffered text is this old
+STREAM_FLUSH_MODE = 'word'
+STREAM_FLUSH_MAX_CHARS = 200
+STREAM_FLUSH_MAX_DELAY_SECONDS = 0.25
+# SQL goes out as one event; set a chunk size (and delay) to pace it instead
+STREAM_SQL_CHUNK_SIZE = None
+STREAM_SQL_CHUNK_DELAY_SECONDS = 0.0
+# End each stream with a `timing` event: per-stage milliseconds, SQL path and
+# attempts, token counts and time to first answer (also on /metrics in aggregate)
+STREAM_TIMING_EVENT = os.getenv('STREAM_TIMING_EVENT', '0') == '1'
+
+# Create the LLM clients, SQL chain, tokenizer and policy vector index during
+# startup. Off (WARM_UP=0) they are created on first use instead, which keeps
+# cold starts short for autoscaled workers
+WARM_UP_ON_STARTUP = os.getenv('WARM_UP', '1') == '1'
+
+# Generated luggage-policy answers (set POLICY_CACHE_PATH to a file to persist them)
+POLICY_CACHE_PATH = None
+POLICY_CACHE_MAX_ENTRIES = 512
+
 logging.basicConfig(level=logging.ERROR)
 logger = logging.getLogger(__name__)
@@ -1,8 +1,14 @@
 import json
-from sqlalchemy import create_engine, Column, String, Integer, REAL
+import re
+from datetime import date as Date
+from sqlalchemy import create_engine, inspect, text, Column, String, Integer, REAL, Index
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
 from sqlalchemy.orm import sessionmaker
 from sqlalchemy.ext.declarative import declarative_base
 
+# Number of rows sent per executemany batch by bulk_load_flights
+BULK_BATCH_SIZE = 1000
+
 # 1. Define the Database Model (Table Structure)
 Base = declarative_base()
 
@@ -22,6 +28,43 @@ class Flight(Base):
     link = Column(String)
     rainProbability = Column(REAL)
     freeMeal = Column(Integer)
+    # Typed columns derived from `date` and `duration` by add_derived_columns
+    date_ordinal = Column(Integer)
+    duration_minutes = Column(Integer)
+
+    __table_args__ = (
+        Index('ix_flights_route_date', 'origin', 'destination', 'date'),
+        # Date ranges are filtered on date_ordinal (see sql_prompt), which only this index can seek on
+        Index('ix_flights_route_day', 'origin', 'destination', 'date_ordinal'),
+        Index('ix_flights_route_price', 'origin', 'destination', 'price_inr'),
+    )
+
+DURATION_PATTERN = re.compile(r'^\s*(?:(\d+)\s*h[a-z]*)?\s*(?:(\d+)\s*m[a-z]*)?\s*$', re.IGNORECASE)
+
+def date_to_ordinal(value):
+    """Convert an ISO date string to a day number (consecutive days differ by 1)."""
+    try:
+        return Date.fromisoformat(value).toordinal()
+    except (TypeError, ValueError):
+        return None
+
+def duration_to_minutes(value):
+    """Convert a duration string such as "4h 15m" to minutes."""
+    if not isinstance(value, str):
+        return None
+    match = DURATION_PATTERN.match(value)
+    if not match or not any(match.groups()):
+        return None
+    hours, minutes = match.groups()
+    return int(hours or 0) * 60 + int(minutes or 0)
+
+def add_derived_columns(item):
+    """Return a copy of a flight record with its typed columns filled in."""
+    return {
+        **item,
+        'date_ordinal': date_to_ordinal(item.get('date')),
+        'duration_minutes': duration_to_minutes(item.get('duration')),
+    }
 
 def json_to_sqlite(json_file, sqlite_file):
     """
@@ -48,7 +91,7 @@ def json_to_sqlite(json_file, sqlite_file):
         # Check if the record already exists to avoid trying to insert duplicates
         exists = session.query(Flight).filter_by(uuid=item['uuid']).first()
         if not exists:
-            new_flight = Flight(**item) # Unpack dict to model attributes
+            new_flight = Flight(**add_derived_columns(item)) # Unpack dict to model attributes
             session.add(new_flight)
             insert_count += 1
     
@@ -60,4 +103,108 @@ def json_to_sqlite(json_file, sqlite_file):
         session.rollback()
     finally:
         session.close()
-        print("Database connection closed.")
\ No newline at end of file
+        print("Database connection closed.")
+
+def _flight_rows(data):
+    """Project raw JSON records onto the columns of the flights table."""
+    columns = [column.name for column in Flight.__table__.columns]
+    for item in data:
+        item = add_derived_columns(item)
+        yield {column: item.get(column) for column in columns}
+
+def _batched(rows, batch_size):
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+def bulk_load_flights(json_file, sqlite_file, batch_size=BULK_BATCH_SIZE):
+    """
+    Bulk upsert flight data from JSON into SQLite.
+
+    Rows are written with batched INSERT ... ON CONFLICT(uuid) DO UPDATE
+    statements inside a single transaction, so a reload costs one round-trip
+    per batch instead of one existence query and ORM object per record.
+    Returns the number of rows written, or None if the JSON could not be read.
+    """
+    engine = create_engine(f'sqlite:///{sqlite_file}')
+    Base.metadata.create_all(engine)
+
+    try:
+        with open(json_file, 'r', encoding='utf-8') as file:
+            data = json.load(file)
+    except (FileNotFoundError, json.JSONDecodeError) as e:
+        print(f"Error reading JSON file: {e}")
+        return None
+
+    table = Flight.__table__
+    stmt = sqlite_insert(table)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[table.c.uuid],
+        set_={column.name: stmt.excluded[column.name]
+              for column in table.columns if not column.primary_key}
+    )
+
+    row_count = 0
+    try:
+        with engine.begin() as conn:
+            for batch in _batched(_flight_rows(data), batch_size):
+                conn.execute(stmt, batch)
+                row_count += len(batch)
+        print(f"Database operation complete. Upserted {row_count} records.")
+        return row_count
+    except Exception as e:
+        print(f"A database error occurred: {e}")
+        return None
+    finally:
+        engine.dispose()
+
+def migrate_flights_schema(sqlite_file):
+    """
+    Bring an existing flights table up to the current model.
+
+    Switches the database to WAL journaling, adds the typed
+    date_ordinal/duration_minutes columns when missing, backfills them for
+    rows that predate the columns and creates the composite route indexes.
+    Safe to run on every startup.
+    """
+    engine = create_engine(f'sqlite:///{sqlite_file}')
+    table = Flight.__table__
+
+    try:
+        # WAL lets the read-only query pool keep reading while this connection writes
+        with engine.connect() as conn:
+            conn.exec_driver_sql('PRAGMA journal_mode=WAL')
+
+        Base.metadata.create_all(engine)
+        existing = {column['name'] for column in inspect(engine).get_columns(table.name)}
+
+        with engine.begin() as conn:
+            for column in ('date_ordinal', 'duration_minutes'):
+                if column not in existing:
+                    conn.execute(text(f'ALTER TABLE {table.name} ADD COLUMN {column} INTEGER'))
+                    print(f"Added column {table.name}.{column}")
+
+            pending = conn.execute(text(
+                f'SELECT uuid, date, duration FROM {table.name} '
+                'WHERE date_ordinal IS NULL OR duration_minutes IS NULL'
+            )).fetchall()
+            if pending:
+                conn.execute(
+                    text(f'UPDATE {table.name} SET date_ordinal = :date_ordinal, '
+                         'duration_minutes = :duration_minutes WHERE uuid = :uuid'),
+                    [{'uuid': uuid,
+                      'date_ordinal': date_to_ordinal(date),
+                      'duration_minutes': duration_to_minutes(duration)}
+                     for uuid, date, duration in pending]
+                )
+                print(f"Backfilled typed columns for {len(pending)} records.")
+
+            for index in table.indexes:
+                index.create(conn, checkfirst=True)
+    finally:
+        engine.dispose()
@@ -0,0 +1,49 @@
+import hashlib
+import json
+import os
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+import numpy as np
+
+# Bump when the sidecar layout or matrix contents change so old caches are
+# rebuilt (2: rows are saved L2-normalized)
+STORE_VERSION = 2
+
+def content_hash(text: str) -> str:
+    return hashlib.sha256(text.encode('utf-8')).hexdigest()
+
+def _paths(cache_dir: str, name: str) -> Tuple[Path, Path]:
+    stem = name.lower().replace(' ', '_')
+    return Path(cache_dir) / f"{stem}.npy", Path(cache_dir) / f"{stem}.json"
+
+def load_embeddings(cache_dir: str, name: str) -> Tuple[Optional[Dict], Optional[np.ndarray]]:
+    """
+    Open a document's cached embeddings: the float32 matrix is memory-mapped
+    from its .npy file and the chunk texts, chunk hashes and source hash come
+    from the JSON sidecar. Returns (None, None) when there is no usable cache.
+    """
+    matrix_path, sidecar_path = _paths(cache_dir, name)
+    try:
+        with open(sidecar_path, 'r', encoding='utf-8') as file:
+            sidecar = json.load(file)
+        matrix = np.load(matrix_path, mmap_mode='r')
+    except (FileNotFoundError, ValueError, OSError):
+        return None, None
+
+    if sidecar.get('version') != STORE_VERSION or matrix.shape[0] != len(sidecar.get('chunk_hashes', [])):
+        return None, None
+    return sidecar, matrix
+
+def save_embeddings(cache_dir: str, name: str, sidecar: Dict, matrix: np.ndarray) -> None:
+    """Write the matrix and sidecar atomically (temp file + rename)."""
+    Path(cache_dir).mkdir(parents=True, exist_ok=True)
+    matrix_path, sidecar_path = _paths(cache_dir, name)
+
+    temp_matrix = matrix_path.with_name(matrix_path.stem + '.tmp.npy')
+    np.save(temp_matrix, np.ascontiguousarray(matrix, dtype=np.float32))
+    os.replace(temp_matrix, matrix_path)
+
+    temp_sidecar = sidecar_path.with_suffix('.json.tmp')
+    with open(temp_sidecar, 'w', encoding='utf-8') as file:
+        json.dump({**sidecar, 'version': STORE_VERSION}, file)
+    os.replace(temp_sidecar, sidecar_path)
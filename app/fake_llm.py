@@ -0,0 +1,70 @@
+import asyncio
+import re
+import time
+from typing import Any, AsyncIterator, Iterator, List, Optional
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk, BaseMessage
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+
+FALLBACK_SQL = ("SELECT uuid, airline, date, duration, flightType, price_inr, origin, destination, link, "
+                "rainProbability, freeMeal FROM flights ORDER BY price_inr ASC LIMIT 10")
+
+def fake_reply(prompt: str) -> str:
+    """A plausible answer for each prompt the pipeline sends, chosen by its wording."""
+    if "Convert the user's flight search request" in prompt:
+        # Imported here: the SQL templates need the database engine from config
+        from sql_templates import compile_question
+        question = re.search(r"User Input: (.*)", prompt)
+        compiled = compile_question(question.group(1).replace("SQLQuery:", "").strip()) if question else None
+        return compiled.render() if compiled else FALLBACK_SQL
+    if "verify if the query correctly answers" in prompt:
+        return "VALID"
+    if "Extract the specific luggage-related question" in prompt:
+        query = re.search(r"Now process this query: (.*)", prompt)
+        return query.group(1).strip() if query else "NONE"
+    if "Write only the summary" in prompt:
+        return "<think>Pick the cheapest row.</think>\n**Summary:** The first flight listed is the cheapest option."
+    return ("<think>Format the rows.</think>\nHere are the flights that match your query. "
+            "The cheapest option is listed first.")
+
+class FakeChatModel(BaseChatModel):
+    """
+    Offline stand-in for the Groq/Ollama chat models: answers from
+    fake_reply after `latency` seconds and streams it word by word with
+    `token_delay` seconds between chunks.
+    """
+
+    latency: float = 0.0
+    token_delay: float = 0.0
+
+    @property
+    def _llm_type(self) -> str:
+        return "fake"
+
+    @staticmethod
+    def _prompt(messages: List[BaseMessage]) -> str:
+        return "\n".join(str(message.content) for message in messages)
+
+    def _generate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None,
+                  run_manager=None, **kwargs: Any) -> ChatResult:
+        time.sleep(self.latency)
+        return ChatResult(generations=[ChatGeneration(message=AIMessage(content=fake_reply(self._prompt(messages))))])
+
+    async def _agenerate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None,
+                         run_manager=None, **kwargs: Any) -> ChatResult:
+        await asyncio.sleep(self.latency)
+        return ChatResult(generations=[ChatGeneration(message=AIMessage(content=fake_reply(self._prompt(messages))))])
+
+    def _stream(self, messages: List[BaseMessage], stop: Optional[List[str]] = None,
+                run_manager=None, **kwargs: Any) -> Iterator[ChatGenerationChunk]:
+        time.sleep(self.latency)
+        for word in re.findall(r"\S+\s*", fake_reply(self._prompt(messages))):
+            time.sleep(self.token_delay)
+            yield ChatGenerationChunk(message=AIMessageChunk(content=word))
+
+    async def _astream(self, messages: List[BaseMessage], stop: Optional[List[str]] = None,
+                       run_manager=None, **kwargs: Any) -> AsyncIterator[ChatGenerationChunk]:
+        await asyncio.sleep(self.latency)
+        for word in re.findall(r"\S+\s*", fake_reply(self._prompt(messages))):
+            await asyncio.sleep(self.token_delay)
+            yield ChatGenerationChunk(message=AIMessageChunk(content=word))
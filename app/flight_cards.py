@@ -0,0 +1,54 @@
+from typing import Dict, List, Optional, Sequence
+
+# Columns a row needs before it can be shown as a card; anything else
+# (aggregates, joined round trips) is left to the LLM
+CARD_COLUMNS = {"airline", "origin", "destination", "date", "price_inr"}
+
+CARDS_HEADER = "### Flight Options\n\n---\n"
+
+def can_render_cards(columns: Sequence[str]) -> bool:
+    return CARD_COLUMNS.issubset(columns) and len(set(columns)) == len(columns)
+
+def format_price(price) -> str:
+    return f"₹{round(float(price)):,}"
+
+def format_meal(value) -> str:
+    return "Yes" if str(value).strip().lower() in ("1", "true", "yes") else "No"
+
+def format_rain(value) -> str:
+    return f"{float(value):g}%"
+
+def cheapest_index(rows: List[Dict]) -> Optional[int]:
+    priced = [(float(row["price_inr"]), i) for i, row in enumerate(rows) if row.get("price_inr") is not None]
+    return min(priced)[1] if priced else None
+
+def render_card(row: Dict, cheapest: bool = False) -> str:
+    """One flight as a markdown card, in the layout the response prompt used."""
+    price = format_price(row["price_inr"]) if row.get("price_inr") is not None else "N/A"
+    lines = [
+        f"**✈️ {row['airline']}{' (Cheapest)' if cheapest else ''}**",
+        f"- **Route:** {row['origin']} → {row['destination']}",
+        f"- **Date:** {row['date']}",
+        f"- **Price:** {f'**{price}**' if cheapest else price}",
+    ]
+    if row.get("duration"):
+        lines.append(f"- **Duration:** {row['duration']}")
+    details = [str(row["flightType"])] if row.get("flightType") else []
+    if "freeMeal" in row:
+        details.append(f"Free Meal ({format_meal(row['freeMeal'])})")
+    if details:
+        lines.append(f"- **Details:** {', '.join(details)}")
+    if row.get("rainProbability") is not None:
+        lines.append(f"- **Weather:** {format_rain(row['rainProbability'])} chance of rain")
+    if row.get("link"):
+        lines.append(f"- **[Book Now]({row['link']})**")
+    return "\n".join(lines) + "\n---\n"
+
+def render_flight_cards(columns: Sequence[str], flight_data: Sequence[tuple]) -> List[str]:
+    """The header followed by one card per row, ready to stream as answer events."""
+    rows = [dict(zip(columns, flight)) for flight in flight_data]
+    cheapest = cheapest_index(rows)
+    cards = [CARDS_HEADER] + [render_card(row, i == cheapest) for i, row in enumerate(rows)]
+    # Blank line before whatever follows the last card (the summary)
+    cards[-1] += "\n"
+    return cards
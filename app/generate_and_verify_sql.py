@@ -1,18 +1,33 @@
-from typing import Tuple
+import logging
+import time
+from typing import Optional, Tuple
 from sqlite3 import Error as SQLiteError
-from langchain.chains import create_sql_query_chain # pylint: disable=no-name-in-module
 from sqlalchemy.exc import SQLAlchemyError
 from fastapi import HTTPException
 from clean_sql_query import clean_sql_query
 from sql_prompt import sql_prompt
 from verify_sql_prompt import verify_sql_prompt
 from strip_think_tags import strip_think_tags
-from config import flight_llm, db, MAX_ATTEMPTS, logger
+from sql_cache import sql_cache
+from schema_version import CachedTableInfo
+from sql_templates import compile_question
+from latency_stats import LatencyStats
+from pipeline_metrics import Trace, approx_tokens, sql_attempts, token_usage
+from sql_validator import INVALID, validate_sql_locally, needs_llm_verification
+from config import flight_llm, get_db, MAX_ATTEMPTS, SQL_TOP_K, SQL_TEMPLATES, logger
+
+# How each question's SQL was produced: "template", "cache" or "llm"
+sql_path_latency = LatencyStats()
+
+# The chain and its schema text are built once per process; the schema
+# text is re-rendered only when the flights schema changes
+table_info_cache = CachedTableInfo(get_db)
+_sql_chain = None
 
 async def get_table_info():
     """Get database schema information"""
     try:
-        return db.get_table_info()
+        return table_info_cache.get_table_info()
     except (SQLAlchemyError, SQLiteError) as e:
         raise HTTPException(
             status_code=500,
@@ -23,26 +38,41 @@ class LoggingSQLChain:
     def __init__(self, chain, _db):
         self.chain = chain
         self.db = _db
+        # Estimated tokens of the prompt without the question, per schema text
+        self._fixed_prompt_tokens: Tuple[Optional[str], int] = (None, 0)
 
-    async def ainvoke(self, inputs):
-        # Get the actual table info from the database
-        table_info = self.db.get_table_info()
+    def format_prompt(self, question: str) -> str:
+        return sql_prompt.format(input=question, top_k=SQL_TOP_K, table_info=self.db.get_table_info())
 
-        # Format the prompt with all variables
-        formatted_prompt = sql_prompt.format(
-            input=inputs["question"],
-            top_k=10,  # or whatever default you want
-            table_info=table_info
-        )
+    def prompt_tokens(self, question: str) -> int:
+        """Estimated prompt tokens, without formatting the whole prompt for every call."""
+        table_info = self.db.get_table_info()
+        if self._fixed_prompt_tokens[0] is not table_info:
+            fixed = sql_prompt.format(input="", top_k=SQL_TOP_K, table_info=table_info)
+            self._fixed_prompt_tokens = (table_info, approx_tokens(fixed))
+        return self._fixed_prompt_tokens[1] + approx_tokens(question)
 
-        # Log the fully formatted prompt
-        logger.info("\n=== RUNTIME SQL PROMPT ===\n")
-        logger.info(formatted_prompt)
-        logger.info("\n=== END RUNTIME SQL PROMPT ===\n")
+    async def ainvoke(self, inputs):
+        # Only format the prompt when it will actually be logged
+        if logger.isEnabledFor(logging.INFO):
+            formatted_prompt = self.format_prompt(inputs["question"])
+            logger.info("\n=== RUNTIME SQL PROMPT ===\n")
+            logger.info(formatted_prompt)
+            logger.info("\n=== END RUNTIME SQL PROMPT ===\n")
 
         return await self.chain.ainvoke(inputs)
 
-async def verify_sql(question: str, sql_query: str) -> Tuple[bool, str]:
+def get_sql_chain() -> LoggingSQLChain:
+    """SQL generation chain with logging wrapper, created on first use."""
+    global _sql_chain
+    if _sql_chain is None:
+        # langchain.chains takes about a second to import
+        from langchain.chains import create_sql_query_chain # pylint: disable=no-name-in-module
+        chain = create_sql_query_chain(llm=flight_llm, db=table_info_cache, prompt=sql_prompt, k=SQL_TOP_K)
+        _sql_chain = LoggingSQLChain(chain, table_info_cache)
+    return _sql_chain
+
+async def verify_sql(question: str, sql_query: str, trace: Optional[Trace] = None) -> Tuple[bool, str]:
     # Generate natural language response
     sql_verify_input = {
         "question": question,
@@ -50,6 +80,9 @@ async def verify_sql(question: str, sql_query: str) -> Tuple[bool, str]:
     }
     verification_prompt = verify_sql_prompt.format(**sql_verify_input)
     verification_response = await flight_llm.ainvoke(verification_prompt)
+    if trace:
+        trace.llm_call("verify_sql", *token_usage(verification_response, verification_prompt,
+                                                  str(verification_response.content)))
     response_text = strip_think_tags(verification_response).strip().upper()
 
     if response_text.startswith("VALID"):
@@ -62,25 +95,81 @@ async def verify_sql(question: str, sql_query: str) -> Tuple[bool, str]:
             reason = "Query does not correctly answer the question"
         return False, reason
 
-async def generate_sql(question: str, attempt: int = 1) -> str:
+async def generate_sql(question: str, trace: Optional[Trace] = None) -> str:
+    start = time.perf_counter()
+    trace = trace or Trace()
+
+    # Common questions compile straight to SQL; anything the parser is not
+    # sure about falls through to the cache and then the LLM
+    with trace.span("sql_template"):
+        compiled = compile_question(question) if SQL_TEMPLATES else None
+    if compiled:
+        # Template SQL gets the same local checks as LLM SQL; a rejected one
+        # falls through to the cache and the LLM
+        with trace.span("sql_validate"):
+            verdict = await validate_sql_locally(compiled.render())
+        if verdict.status != INVALID:
+            sql_path_latency.since("template", start)
+            trace.set("sql_path", "template")
+            logger.info("SQL template match for question: %s", question)
+            return verdict.sql
+        logger.warning("Locally rejected template SQL. Reason: %s", verdict.reason)
+
+    # Previously verified SQL for the same question skips the LLM entirely
+    with trace.span("sql_cache"):
+        cached_query = sql_cache.get(question)
+    if cached_query:
+        sql_path_latency.since("cache", start)
+        trace.set("sql_path", "cache")
+        logger.info("SQL cache hit for question: %s", question)
+        return cached_query
+
+    trace.set("sql_path", "llm")
+    try:
+        query = await generate_sql_with_llm(question, trace=trace)
+    except Exception:
+        sql_path_latency.since("llm", start, ok=False)
+        raise
+    finally:
+        sql_attempts.observe(trace.attributes.get("sql_attempts", 0))
+    sql_path_latency.since("llm", start)
+    return query
+
+async def generate_sql_with_llm(question: str, attempt: int = 1, trace: Optional[Trace] = None) -> str:
     if attempt > MAX_ATTEMPTS:
         raise ValueError(f"Failed to generate valid SQL query after {MAX_ATTEMPTS} attempts")
-
-    # Initialize SQL generation chain with logging wrapper
-    sql_chain = create_sql_query_chain(llm=flight_llm, db=db, prompt=sql_prompt)
-    logging_chain = LoggingSQLChain(sql_chain, db)
+    trace = trace or Trace()
+    trace.set("sql_attempts", attempt)
 
     # Generate SQL query
-    sql_query_response = await logging_chain.ainvoke({"question": question})
+    chain = get_sql_chain()
+    with trace.span("sql_llm"):
+        sql_query_response = await chain.ainvoke({"question": question})
+    trace.llm_call("sql", chain.prompt_tokens(question), approx_tokens(sql_query_response))
     sql_query = strip_think_tags(sql_query_response)
     cleaned_query = clean_sql_query(sql_query)
 
+    # Cheap local checks first: a query that cannot be right is retried without
+    # asking the LLM verifier, and a simple valid one may not need it at all
+    with trace.span("sql_validate"):
+        verdict = await validate_sql_locally(cleaned_query)
+    if verdict.status == INVALID:
+        logger.warning("Locally rejected SQL query on attempt %d. Reason: %s", attempt, verdict.reason)
+        return await generate_sql_with_llm(question, attempt + 1, trace)
+    cleaned_query = verdict.sql
+
     # Verify the query
-    is_valid, reason = await verify_sql(question, cleaned_query)
+    if needs_llm_verification(verdict):
+        with trace.span("sql_verify"):
+            is_valid, reason = await verify_sql(question, cleaned_query, trace)
+    else:
+        logger.info("Skipping LLM verification for locally validated query")
+        is_valid, reason = True, ""
 
     if is_valid:
         logger.info("Valid SQL query generated on attempt %d", attempt)
+        sql_cache.put(question, cleaned_query)
         return cleaned_query
     else:
         logger.warning("Invalid SQL query on attempt %d. Reason: %s", attempt, reason)
-        return await generate_sql(question, attempt + 1)
+        return await generate_sql_with_llm(question, attempt + 1, trace)
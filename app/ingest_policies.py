@@ -0,0 +1,85 @@
+"""
+Rebuild the policy embedding cache and retrieval indexes for a directory of
+airline policy documents and report ingestion throughput. The documents and
+cache are registered with the API (config.POLICY_DOCUMENTS_PATH), which
+serves them from its next start instead of its built-in documents.
+
+Usage:
+    python3 app/ingest_policies.py --dir data --workers 4
+"""
+import argparse
+import asyncio
+import os
+import time
+from pathlib import Path
+from airlines import VALID_AIRLINES
+from bm25_index import BM25Index
+from vector_index import HashingEmbeddingBackend, OpenAIEmbeddingBackend, VectorIndex
+import vector_db
+from config import POLICY_DOCUMENTS_PATH
+
+DEFAULT_DIR = Path(__file__).parent.parent / 'data'
+
+def airline_for_file(path: Path) -> str:
+    """Airline name for a policy file: the configured document that uses it,
+    else the airline whose name matches the file stem (indigo_policy.txt -> IndiGo)."""
+    for doc in vector_db.documents:
+        if Path(doc["policy_file"]).name == path.name:
+            return doc["name"]
+
+    stem = path.stem.lower().replace('_policy', '').replace('_', '').replace('-', '')
+    for airline in VALID_AIRLINES:
+        if airline.lower().replace(' ', '') == stem:
+            return airline
+    return path.stem.replace('_policy', '').replace('_', ' ').title()
+
+def discover_documents(directory: str, pattern: str):
+    return [{"name": airline_for_file(path), "policy_file": str(path.absolute())}
+            for path in sorted(Path(directory).glob(pattern)) if path.is_file()]
+
+async def ingest(documents, cache_dir: str, workers: int):
+    start = time.perf_counter()
+    index = VectorIndex(await vector_db.process_documents(documents, cache_dir, workers=workers))
+    keyword_sections = 0
+    for doc in documents:
+        text = vector_db.read_file(doc["policy_file"])
+        keyword_sections += len(BM25Index([s for s in text.split("\n\n") if s.strip()]).passages)
+    return time.perf_counter() - start, index, keyword_sections
+
+def main():
+    parser = argparse.ArgumentParser(description="Rebuild the airline policy indexes")
+    parser.add_argument('--dir', default=str(DEFAULT_DIR), help="Directory of policy documents")
+    parser.add_argument('--pattern', default='*_policy.txt', help="Glob for policy files in --dir")
+    parser.add_argument('--cache-dir', default=vector_db.DEFAULT_EMBEDDING_CACHE_DIR)
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1,
+                        help="Processes used to chunk documents")
+    parser.add_argument('--backend', choices=['openai', 'hashing'], default=None,
+                        help="Override the EMBEDDING_BACKEND setting")
+    parser.add_argument('--no-register', action='store_true',
+                        help="Only measure ingestion; leave the documents the API serves unchanged")
+    args = parser.parse_args()
+
+    if args.backend == 'hashing':
+        vector_db.embedding_backend = HashingEmbeddingBackend()
+    elif args.backend == 'openai':
+        vector_db.embedding_backend = OpenAIEmbeddingBackend(vector_db.get_openai_client())
+
+    documents = discover_documents(args.dir, args.pattern)
+    if not documents:
+        parser.error(f"No files matching {args.pattern} in {args.dir}")
+
+    total_bytes = sum(os.path.getsize(doc["policy_file"]) for doc in documents)
+    elapsed, index, keyword_sections = asyncio.run(ingest(documents, args.cache_dir, args.workers))
+
+    print(f"documents        {len(documents)}")
+    print(f"chunks indexed   {len(index)}")
+    print(f"bm25 sections    {keyword_sections}")
+    print(f"elapsed          {elapsed:.2f}s")
+    print(f"throughput       {total_bytes / 1e6 / elapsed:.2f} MB/s, {len(index) / elapsed:.1f} chunks/s")
+
+    if not args.no_register:
+        vector_db.register_documents(documents, args.cache_dir)
+        print(f"registered       {os.path.abspath(POLICY_DOCUMENTS_PATH)}")
+
+if __name__ == "__main__":
+    main()
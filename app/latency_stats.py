@@ -0,0 +1,26 @@
+import time
+from typing import Dict
+
+class LatencyStats:
+    """Call counts and latency per named path (e.g. how SQL was produced)."""
+
+    def __init__(self):
+        self._paths: Dict[str, Dict[str, float]] = {}
+
+    def record(self, path: str, seconds: float, ok: bool = True) -> None:
+        entry = self._paths.setdefault(path, {'count': 0, 'errors': 0, 'total_ms': 0.0, 'max_ms': 0.0})
+        entry['count'] += 1
+        entry['errors'] += 0 if ok else 1
+        entry['total_ms'] += seconds * 1000
+        entry['max_ms'] = max(entry['max_ms'], seconds * 1000)
+
+    def since(self, path: str, start: float, ok: bool = True) -> None:
+        """Record the time elapsed since a time.perf_counter() reading."""
+        self.record(path, time.perf_counter() - start, ok)
+
+    def stats(self) -> Dict[str, Dict[str, float]]:
+        return {
+            path: {**entry, 'avg_ms': round(entry['total_ms'] / entry['count'], 3),
+                   'total_ms': round(entry['total_ms'], 3), 'max_ms': round(entry['max_ms'], 3)}
+            for path, entry in self._paths.items()
+        }
@@ -1,17 +1,24 @@
 import os
-from langchain_ollama import ChatOllama
-from langchain_groq import ChatGroq
 from dotenv import load_dotenv
 
 load_dotenv()
 
 def get_llm(model_name, platform_name="OLLAMA"):
+    if platform_name == "FAKE":
+        # Offline provider for tests and load testing; model_name is only a label
+        from fake_llm import FakeChatModel
+        return FakeChatModel(latency=float(os.getenv("FAKE_LLM_LATENCY", "0")),
+                             token_delay=float(os.getenv("FAKE_LLM_TOKEN_DELAY", "0")))
+    # Provider packages are imported only for the platform in use; each one
+    # adds hundreds of milliseconds to process start
     if platform_name == "OLLAMA":
+        from langchain_ollama import ChatOllama
         return ChatOllama(
             model=model_name,
             temperature=0.2,
         )
     elif platform_name == "GROQ":
+        from langchain_groq import ChatGroq
         return ChatGroq(
             temperature=1,
             model=model_name,
@@ -0,0 +1,163 @@
+import asyncio
+import time
+from contextlib import asynccontextmanager
+from typing import Callable, Dict, Optional
+from langchain_core.runnables import Runnable
+
+class LLMOverloadedError(Exception):
+    """An LLM call could not start: its queue was full or its deadline passed."""
+
+class LLMGate:
+    """
+    Admission for one provider/model: a token bucket of requests per minute,
+    at most `max_concurrency` calls in flight, and a bounded queue whose
+    entries give up after `queue_timeout` seconds.
+    """
+
+    def __init__(self, name: str, requests_per_minute: float, max_concurrency: int,
+                 max_queue: int, queue_timeout: float, burst: Optional[int] = None):
+        self.name = name
+        self.rate = requests_per_minute / 60
+        self.capacity = burst or max_concurrency
+        self.max_concurrency = max_concurrency
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+
+        self._tokens = float(self.capacity)
+        self._updated = time.monotonic()
+        self._semaphore = None
+        self.waiting = 0
+        self.active = 0
+        self.admitted = 0
+        self.rejected = 0
+        self.timed_out = 0
+        self.total_wait = 0.0
+
+    def _take_token(self) -> float:
+        """Take a request token; returns 0, or the seconds until one is available."""
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+        if self._tokens >= 1:
+            self._tokens -= 1
+            return 0.0
+        return (1 - self._tokens) / self.rate
+
+    def _timeout(self) -> LLMOverloadedError:
+        self.timed_out += 1
+        return LLMOverloadedError(f"{self.name}: no capacity within {self.queue_timeout}s")
+
+    async def acquire(self) -> None:
+        if self.waiting >= self.max_queue:
+            self.rejected += 1
+            raise LLMOverloadedError(f"{self.name}: {self.waiting} requests already queued")
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+
+        start = time.monotonic()
+        deadline = start + self.queue_timeout
+        self.waiting += 1
+        try:
+            try:
+                await asyncio.wait_for(self._semaphore.acquire(), deadline - time.monotonic())
+            except asyncio.TimeoutError as e:
+                raise self._timeout() from e
+            try:
+                while (wait := self._take_token()) > 0:
+                    if time.monotonic() + wait > deadline:
+                        raise self._timeout()
+                    await asyncio.sleep(wait)
+            except BaseException:
+                self._semaphore.release()
+                raise
+        finally:
+            self.waiting -= 1
+
+        self.active += 1
+        self.admitted += 1
+        self.total_wait += time.monotonic() - start
+
+    def release(self) -> None:
+        self.active -= 1
+        self._semaphore.release()
+
+    @asynccontextmanager
+    async def slot(self):
+        await self.acquire()
+        try:
+            yield
+        finally:
+            self.release()
+
+    def stats(self) -> Dict[str, float]:
+        return {
+            "active": self.active,
+            "queued": self.waiting,
+            "admitted": self.admitted,
+            "rejected": self.rejected,
+            "timed_out": self.timed_out,
+            "avg_wait_ms": round(self.total_wait / self.admitted * 1000, 3) if self.admitted else 0.0,
+        }
+
+class GatedLLM(Runnable):
+    """
+    A chat model whose async calls first take a slot from its gate. Being a
+    Runnable, it can be used anywhere the bare model was, including in
+    chains (create_sql_query_chain binds stop words onto it). The model is
+    created by `factory` on first use, so importing config stays cheap.
+    """
+
+    def __init__(self, factory: Callable[[], Runnable], gate: LLMGate):
+        self._factory = factory
+        self._llm = None
+        self.gate = gate
+
+    @property
+    def llm(self) -> Runnable:
+        if self._llm is None:
+            self._llm = self._factory()
+        return self._llm
+
+    def invoke(self, input, config=None, **kwargs):  # pylint: disable=redefined-builtin
+        return self.llm.invoke(input, config, **kwargs)
+
+    async def ainvoke(self, input, config=None, **kwargs):  # pylint: disable=redefined-builtin
+        async with self.gate.slot():
+            return await self.llm.ainvoke(input, config, **kwargs)
+
+    async def astream(self, input, config=None, **kwargs):  # pylint: disable=redefined-builtin
+        async with self.gate.slot():
+            async for chunk in self.llm.astream(input, config, **kwargs):
+                yield chunk
+
+    def __getattr__(self, name):
+        if name.startswith("_"):
+            raise AttributeError(name)
+        return getattr(self.llm, name)
+
+class LLMGateway:
+    """One gate per provider/model, shared by every client of that model."""
+
+    def __init__(self, limits: Dict[str, Dict], default_limits: Dict, max_queue: int, queue_timeout: float):
+        self.limits = limits
+        self.default_limits = default_limits
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self.gates: Dict[str, LLMGate] = {}
+
+    def gate(self, platform_name: str, model_name: str) -> LLMGate:
+        name = f"{platform_name}:{model_name}"
+        if name not in self.gates:
+            limits = {**self.default_limits, **self.limits.get(name, {})}
+            self.gates[name] = LLMGate(name, max_queue=self.max_queue, queue_timeout=self.queue_timeout, **limits)
+        return self.gates[name]
+
+    def wrap(self, factory: Callable[[], Runnable], platform_name: str, model_name: str) -> GatedLLM:
+        return GatedLLM(factory, self.gate(platform_name, model_name))
+
+    def queued(self) -> int:
+        """LLM calls waiting for a slot across every provider/model."""
+        return sum(gate.waiting for gate in self.gates.values())
+
+    def stats(self) -> Dict[str, Dict[str, float]]:
+        return {name: gate.stats() for name, gate in self.gates.items()}
@@ -1,11 +1,26 @@
 import sqlite3
 from pathlib import Path
 import uvicorn
-from fastapi import FastAPI, Query
+from fastapi import FastAPI, HTTPException, Query
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import PlainTextResponse
 from sse_starlette.sse import EventSourceResponse
-from database import json_to_sqlite
+from database import bulk_load_flights, migrate_flights_schema
 from query_chain import stream_response
+from config import (
+    refresh_db_schema, llm_gateway, flight_llm, luggage_llm, FLIGHTS_SNAPSHOT, STREAM_COALESCING,
+    LLM_ADMISSION_MAX_QUEUED, WARM_UP_ON_STARTUP, logger
+)
+from sql_cache import sql_cache
+from generate_and_verify_sql import sql_path_latency, table_info_cache, get_sql_chain
+from policy_cache import policy_answer_cache
+from vector_db import build_policy_index, build_keyword_indexes
+from stream_coalescer import StreamCoalescer
+from round_trip import get_round_trip_index, invalidate_round_trip_index
+from pipeline_metrics import registry
+
+# Identical concurrent questions share one run of the pipeline
+stream_coalescer = StreamCoalescer(stream_response)
 
 # Initialize the FastAPI app
 app = FastAPI(title="Flight Query API")
@@ -25,18 +40,77 @@ app.add_middleware(
 
 @app.get("/stream")
 async def stream_query(question: str = Query(...)):
+    # Admission control: while the LLM queues are this deep a new run would only
+    # wait and time out, so turn it away now. Joining a run in flight costs nothing.
+    joins_run = STREAM_COALESCING and stream_coalescer.in_flight(question)
+    if not joins_run and llm_gateway.queued() >= LLM_ADMISSION_MAX_QUEUED:
+        raise HTTPException(
+            status_code=503,
+            detail="Too many requests in progress. Please retry shortly.",
+            headers={"Retry-After": "5"}
+        )
     return EventSourceResponse(
-        stream_response(question),  # Remove 'events=' keyword
+        stream_coalescer.subscribe(question) if STREAM_COALESCING else stream_response(question),
         media_type="text/event-stream"
     )
 
+@app.get("/stats/sql-cache")
+async def sql_cache_stats():
+    return sql_cache.stats()
+
+@app.get("/stats/sql-paths")
+async def sql_path_stats():
+    return sql_path_latency.stats()
+
+@app.get("/stats/coalescing")
+async def coalescing_stats():
+    return stream_coalescer.stats()
+
+@app.get("/stats/llm")
+async def llm_stats():
+    return llm_gateway.stats()
+
+@app.get("/stats/policy-cache")
+async def policy_cache_stats():
+    return policy_answer_cache.stats()
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def metrics():
+    """Pipeline stage latency, SQL attempt and token histograms for Prometheus."""
+    return PlainTextResponse(registry.render(), media_type="text/plain; version=0.0.4")
+
 # Event handlers for startup and shutdown
 @app.on_event("startup")
 async def startup_event():
-    db_path = Path('./flights.db')
-    # Check if database file exists and is empty
-    if is_database_empty(db_path):
-        json_to_sqlite('./data/flight_data.json', './flights.db')
+    if FLIGHTS_SNAPSHOT:
+        # Prebuilt, already indexed and opened read-only: nothing to load or migrate
+        logger.info("Serving flights snapshot %s", FLIGHTS_SNAPSHOT)
+    else:
+        db_path = Path('./flights.db')
+        # Check if database file exists and is empty
+        if is_database_empty(db_path):
+            bulk_load_flights('./data/flight_data.json', './flights.db')
+        # Add typed columns and route indexes, then let the SQL chain see them
+        migrate_flights_schema('./flights.db')
+        refresh_db_schema()
+        table_info_cache.invalidate()
+        invalidate_round_trip_index()
+
+    build_keyword_indexes()
+    if WARM_UP_ON_STARTUP:
+        await warm_up()
+
+async def warm_up():
+    """Create everything the first request would otherwise wait for."""
+    _ = flight_llm.llm, luggage_llm.llm
+    get_sql_chain()
+    table_info_cache.get_table_info()
+    await get_round_trip_index()
+    # Luggage lookups fall back to BM25 alone if the policies cannot be embedded
+    try:
+        await build_policy_index()
+    except Exception as e:
+        logger.warning("Could not build policy vector index: %s", str(e))
 
 def is_database_empty(db_path):
     try:
@@ -0,0 +1,41 @@
+import re
+from typing import Tuple
+from cities import CITIES, CITY_ALIASES
+
+# Every spelling of every city, lowercased and mapped to a single-token form
+# such as "new_delhi" so multi-word names survive tokenization
+_CITY_TOKENS = {name.lower(): name.lower().replace(' ', '_') for name in CITIES}
+_CITY_TOKENS.update({alias: canonical.lower().replace(' ', '_')
+                     for alias, canonical in CITY_ALIASES.items()})
+CITY_TOKENS = set(_CITY_TOKENS.values())
+
+# Longest names first so "new delhi" wins over "delhi" at the same position
+_CITY_PATTERN = re.compile(
+    r'\b(' + '|'.join(re.escape(name) for name in sorted(_CITY_TOKENS, key=len, reverse=True)) + r')\b'
+)
+
+def normalize_question(question: str) -> str:
+    """
+    Normalize a user question into a stable lookup key: lowercase, fold
+    punctuation and whitespace, and canonicalize city names and aliases
+    ("Delhi", "new-delhi" and "New Delhi" all become "new_delhi").
+    """
+    if not isinstance(question, str):
+        return ""
+
+    text = question.lower()
+    # Drop thousands separators, then keep word characters, currency symbols,
+    # comparison operators and decimal points inside numbers
+    text = re.sub(r'(?<=\d),(?=\d{3}\b)', '', text)
+    text = re.sub(r'(?<!\d)\.|\.(?!\d)', ' ', text)
+    text = re.sub(r'([<>=])', r' \1 ', text)
+    text = re.sub(r'[^\w\s.₹$€<>=]', ' ', text)
+    text = re.sub(r'\s+', ' ', text).strip()
+    return _CITY_PATTERN.sub(lambda m: _CITY_TOKENS[m.group(0)], text)
+
+def question_entities(normalized: str) -> Tuple[str, ...]:
+    """Ordered cities, numbers and comparison operators of a normalized question;
+    two questions can only share an answer when these are identical."""
+    return tuple(token for token in normalized.split()
+                 if token in CITY_TOKENS or token in '<>='
+                 or any(char.isdigit() for char in token))
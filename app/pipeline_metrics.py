@@ -0,0 +1,159 @@
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from typing import Dict, List, Optional, Sequence, Tuple
+
+# Seconds; covers template SQL (~1 ms) up to slow LLM calls
+LATENCY_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+TOKEN_BUCKETS = (16, 32, 64, 128, 256, 512, 1024, 2048, 4096, 8192)
+ATTEMPT_BUCKETS = (1, 2, 3, 4, 5)
+
+Labels = Tuple[Tuple[str, str], ...]
+
+def _labels(labels: Dict[str, str]) -> Labels:
+    return tuple(sorted((key, str(value)) for key, value in labels.items()))
+
+def _format_labels(labels: Labels, extra: Optional[Tuple[str, str]] = None) -> str:
+    pairs = list(labels) + ([extra] if extra else [])
+    if not pairs:
+        return ""
+    escaped = (value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") for _, value in pairs)
+    return "{" + ",".join(f'{key}="{value}"' for (key, _), value in zip(pairs, escaped)) + "}"
+
+def _number(value: float) -> str:
+    return "+Inf" if value == float("inf") else f"{value:g}"
+
+class Counter:
+    def __init__(self, name: str, documentation: str):
+        self.name = name
+        self.documentation = documentation
+        self._values: Dict[Labels, float] = {}
+
+    def inc(self, amount: float = 1, **labels) -> None:
+        key = _labels(labels)
+        self._values[key] = self._values.get(key, 0) + amount
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} counter"]
+        lines.extend(f"{self.name}{_format_labels(labels)} {_number(value)}"
+                     for labels, value in sorted(self._values.items()))
+        return lines
+
+class Histogram:
+    """Cumulative-bucket histogram per label set, as Prometheus exposes them."""
+
+    def __init__(self, name: str, documentation: str, buckets: Sequence[float] = LATENCY_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.buckets = tuple(sorted(buckets)) + (float("inf"),)
+        # label set -> (per-bucket counts, sum)
+        self._series: Dict[Labels, Tuple[List[int], List[float]]] = {}
+
+    def observe(self, value: float, **labels) -> None:
+        counts, total = self._series.setdefault(_labels(labels), ([0] * len(self.buckets), [0.0]))
+        counts[bisect_left(self.buckets, value)] += 1
+        total[0] += value
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} histogram"]
+        for labels, (counts, total) in sorted(self._series.items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets, counts):
+                cumulative += count
+                lines.append(f"{self.name}_bucket{_format_labels(labels, ('le', _number(bound)))} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(labels)} {_number(total[0])}")
+            lines.append(f"{self.name}_count{_format_labels(labels)} {cumulative}")
+        return lines
+
+class MetricsRegistry:
+    def __init__(self):
+        self._metrics: Dict[str, object] = {}
+
+    def histogram(self, name: str, documentation: str, buckets: Sequence[float] = LATENCY_BUCKETS) -> Histogram:
+        return self._metrics.setdefault(name, Histogram(name, documentation, buckets))
+
+    def counter(self, name: str, documentation: str) -> Counter:
+        return self._metrics.setdefault(name, Counter(name, documentation))
+
+    def render(self) -> str:
+        """Every metric in the Prometheus text exposition format."""
+        lines = []
+        for metric in self._metrics.values():
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+registry = MetricsRegistry()
+stage_seconds = registry.histogram(
+    "flight_pipeline_stage_seconds", "Time spent in each stage of the /stream pipeline")
+requests_total = registry.counter(
+    "flight_pipeline_requests_total", "Pipeline runs by outcome")
+sql_attempts = registry.histogram(
+    "flight_pipeline_sql_attempts", "LLM SQL generation attempts per question", ATTEMPT_BUCKETS)
+concurrency_saved_seconds = registry.histogram(
+    "flight_pipeline_concurrency_saved_seconds",
+    "Time saved by running the pre-response stages concurrently instead of one after another")
+llm_tokens = registry.histogram(
+    "flight_pipeline_llm_tokens", "Prompt and completion tokens per LLM call", TOKEN_BUCKETS)
+
+def approx_tokens(text: str) -> int:
+    """Rough token count (about four characters per token) for providers that report no usage."""
+    return (len(text) + 3) // 4
+
+def token_usage(message, prompt: str, completion: str) -> Tuple[int, int]:
+    """(prompt, completion) tokens as reported by the provider, else estimated from the text."""
+    usage = getattr(message, "usage_metadata", None)
+    if usage:
+        return usage["input_tokens"], usage["output_tokens"]
+    return approx_tokens(prompt), approx_tokens(completion)
+
+class Trace:
+    """
+    Spans and attributes of one pipeline run. Each finished span is also
+    observed in the stage_seconds histogram; stages named "<stage>:<detail>"
+    (e.g. "policy:IndiGo") are aggregated under <stage>.
+    """
+
+    def __init__(self):
+        self.start = time.perf_counter()
+        self.stages: Dict[str, float] = {}
+        self.attributes: Dict[str, object] = {}
+
+    def record(self, stage: str, seconds: float) -> None:
+        self.stages[stage] = self.stages.get(stage, 0.0) + seconds
+        stage_seconds.observe(seconds, stage=stage.split(":", 1)[0])
+
+    @contextmanager
+    def span(self, stage: str):
+        """Time a block; a cancelled block is not recorded."""
+        start = time.perf_counter()
+        try:
+            yield
+        except Exception:
+            self.record(stage, time.perf_counter() - start)
+            raise
+        self.record(stage, time.perf_counter() - start)
+
+    def set(self, key: str, value) -> None:
+        self.attributes[key] = value
+
+    def llm_call(self, call: str, prompt_tokens: int, completion_tokens: int) -> None:
+        llm_tokens.observe(prompt_tokens, call=call, kind="prompt")
+        llm_tokens.observe(completion_tokens, call=call, kind="completion")
+        self.attributes[f"{call}_prompt_tokens"] = self.attributes.get(f"{call}_prompt_tokens", 0) + prompt_tokens
+        self.attributes[f"{call}_completion_tokens"] = (
+            self.attributes.get(f"{call}_completion_tokens", 0) + completion_tokens)
+
+    def elapsed(self) -> float:
+        return time.perf_counter() - self.start
+
+    def finish(self, outcome: str) -> None:
+        self.record("total", self.elapsed())
+        self.attributes["outcome"] = outcome
+        requests_total.inc(outcome=outcome)
+
+    def summary(self) -> Dict[str, object]:
+        """Stage times in milliseconds plus attributes, e.g. for a `timing` event."""
+        return {
+            "stages_ms": {stage: round(seconds * 1000, 3) for stage, seconds in self.stages.items()},
+            **self.attributes,
+        }
@@ -0,0 +1,110 @@
+import hashlib
+import os
+import sqlite3
+from collections import OrderedDict
+from contextlib import closing
+from typing import Dict, Optional, Tuple
+from config import logger, POLICY_CACHE_PATH, POLICY_CACHE_MAX_ENTRIES
+
+# path -> ((mtime_ns, size), text, sha256 of text)
+_policy_files: Dict[str, Tuple[Tuple[int, int], str, str]] = {}
+
+def read_policy_file(path: str) -> Tuple[str, str]:
+    """
+    Return a policy file's text and content hash. The file is only re-read
+    when its modification time or size changes, so edits under data/ are
+    picked up on the next lookup.
+    """
+    stat = os.stat(path)
+    signature = (stat.st_mtime_ns, stat.st_size)
+    cached = _policy_files.get(path)
+    if cached and cached[0] == signature:
+        return cached[1], cached[2]
+
+    with open(path, 'r', encoding='utf-8') as file:
+        text = file.read()
+    digest = hashlib.sha256(text.encode('utf-8')).hexdigest()
+    _policy_files[path] = (signature, text, digest)
+    return text, digest
+
+PolicyKey = Tuple[str, str, str]  # (airline, normalized luggage query, policy file hash)
+
+class PolicyAnswerCache:
+    """
+    Size-bounded LRU cache of generated luggage-policy answers, optionally
+    mirrored to a SQLite file. Keys include the policy file hash, and
+    answers for an older version of an airline's policy are dropped as soon
+    as an answer for the new version is stored.
+    """
+
+    def __init__(self, path: Optional[str], max_entries: int):
+        self.path = path
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[PolicyKey, str]" = OrderedDict()
+        self._loaded = False
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: PolicyKey) -> Optional[str]:
+        self._load()
+        answer = self._entries.get(key)
+        if answer is None:
+            self.misses += 1
+            return None
+
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return answer
+
+    def put(self, key: PolicyKey, answer: str) -> None:
+        self._load()
+        airline, _, digest = key
+        stale = [old for old in self._entries if old[0] == airline and old[2] != digest]
+        for old in stale:
+            del self._entries[old]
+        if stale:
+            self._execute("DELETE FROM policy_answers WHERE airline = ? AND digest != ?", (airline, digest))
+
+        self._entries[key] = answer
+        self._entries.move_to_end(key)
+        self._execute("INSERT OR REPLACE INTO policy_answers (airline, query, digest, answer) VALUES (?, ?, ?, ?)",
+                      (*key, answer))
+
+        while len(self._entries) > self.max_entries:
+            evicted, _ = self._entries.popitem(last=False)
+            self._execute("DELETE FROM policy_answers WHERE airline = ? AND query = ? AND digest = ?", evicted)
+
+    def stats(self) -> Dict[str, float]:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": self.hits / lookups if lookups else 0.0,
+        }
+
+    def _load(self) -> None:
+        if self._loaded:
+            return
+        self._loaded = True
+        self._execute(
+            "CREATE TABLE IF NOT EXISTS policy_answers ("
+            "airline TEXT NOT NULL, query TEXT NOT NULL, digest TEXT NOT NULL, answer TEXT NOT NULL, "
+            "PRIMARY KEY (airline, query, digest))"
+        )
+        rows = self._execute("SELECT airline, query, digest, answer FROM policy_answers "
+                             "ORDER BY rowid DESC LIMIT ?", (self.max_entries,))
+        for airline, query, digest, answer in reversed(rows):
+            self._entries[(airline, query, digest)] = answer
+
+    def _execute(self, statement: str, params: tuple = ()) -> list:
+        if not self.path:
+            return []
+        try:
+            with closing(sqlite3.connect(self.path)) as conn, conn:
+                return conn.execute(statement, params).fetchall()
+        except sqlite3.Error as e:
+            logger.warning("Policy cache storage error: %s", str(e))
+            return []
+
+policy_answer_cache = PolicyAnswerCache(path=POLICY_CACHE_PATH, max_entries=POLICY_CACHE_MAX_ENTRIES)
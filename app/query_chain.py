@@ -1,121 +1,251 @@
-import re
 import json
+import time
 import asyncio
-from typing import AsyncGenerator
+from typing import AsyncGenerator, Awaitable, Optional
 from sqlite3 import Error as SQLiteError
 from sqlalchemy.exc import SQLAlchemyError
-from langchain_core.messages import AIMessage
-from query_validator import is_flight_related_query, is_luggage_related_query
+from query_validator import classify_query
 from luggage_extractor import extract_luggage_query
 from fastapi import HTTPException
 from response_prompt import response_prompt
+from summary_prompt import summary_prompt
+from flight_cards import can_render_cards, render_flight_cards
 from generate_and_verify_sql import generate_sql
-from config import flight_llm, db, logger
-from vector_db import search_policy
-from util import parse_tuple_list
+from round_trip import parse_round_trip, round_trip_search
+from config import (
+    flight_llm, RESPONSE_MODE, ROUND_TRIP_SEARCH, STREAM_SQL_CHUNK_DELAY_SECONDS, STREAM_TIMING_EVENT, logger
+)
+from vector_db import search_policy, documents
+from async_db import run_query
 from airlines import VALID_AIRLINES
+from answer_stream import AnswerStream, sql_chunks
+from result_encoding import encode_results
+from pipeline_metrics import Trace, concurrency_saved_seconds, token_usage
+
+# Stages before the response that could run one after another; their sum
+# against the elapsed time shows what running them concurrently saves
+PRE_RESPONSE_STAGES = ("classify", "generate_sql", "execute_query", "round_trip_search", "stream_sql", "extract_luggage")
+
+async def _timed(trace: Trace, stage: str, awaitable: Awaitable):
+    """Await a pipeline stage and record how long it took unless it was cancelled."""
+    with trace.span(stage):
+        return await awaitable
+
+async def _prefetch_policy(trace: Trace, airline: str,
+                           luggage_task: "asyncio.Task[Optional[str]]") -> Optional[str]:
+    """Look up an airline's policy as soon as the luggage question is known."""
+    # Shielded so cancelling one speculative lookup leaves the shared extraction running
+    luggage_query = await asyncio.shield(luggage_task)
+    if not luggage_query:
+        return None
+    return await _timed(trace, f"policy:{airline}", search_policy(airline, luggage_query))
+
+def _mark_first_answer(trace: Trace) -> None:
+    """Record when the first answer content went out, whichever step sent it."""
+    if "first_answer_ms" not in trace.attributes:
+        trace.set("first_answer_ms", round(trace.elapsed() * 1000, 3))
+
+def _cancel_pending(tasks) -> None:
+    for task in tasks:
+        if not task.done():
+            task.cancel()
+        elif not task.cancelled():
+            # Mark failures of unused speculative work as retrieved
+            task.exception()
 
 async def stream_response(question: str) -> AsyncGenerator[str, None]:
+    """Pipeline events for one question, traced into the /metrics histograms
+    and, with STREAM_TIMING_EVENT, followed by a `timing` event."""
+    trace = Trace()
+    completed = False
     try:
-        if not is_flight_related_query(question):
+        async for event in _run_pipeline(question, trace):
+            yield event
+        completed = True
+    finally:
+        trace.finish(trace.attributes.get("outcome", "ok") if completed else "cancelled")
+    if STREAM_TIMING_EVENT:
+        yield json.dumps({"type": "timing", "content": trace.summary()})
+
+async def _run_pipeline(question: str, trace: Trace) -> AsyncGenerator[str, None]:
+    pipeline_tasks = []
+
+    try:
+        with trace.span("classify"):
+            intents = classify_query(question)
+        if not intents.flight:
+            trace.set("outcome", "not_flight")
             yield json.dumps({
                 "type": "error",
                 "content": "Query not related to flight data. Please ask about flights, prices, routes, or travel dates."
             })
             return
 
-        # Step 1: Generate and verify SQL query
-        cleaned_query = await generate_sql(question)
-
-        # Step 2: Stream SQL query in chunks
-        sql_chunks = [cleaned_query[i:i+10] for i in range(0, len(cleaned_query), 10)]
-        for chunk in sql_chunks:
+        # Stage graph: SQL generation -> execution, while luggage extraction
+        # -> policy lookup for every airline with a policy document runs
+        # alongside it. Lookups for airlines missing from the results are
+        # cancelled once the rows are known. Round trips skip SQL altogether:
+        # the native search pairs outbound and return fares directly.
+        round_trip = parse_round_trip(question) if ROUND_TRIP_SEARCH else None
+        if round_trip:
+            trace.set("sql_path", "round_trip")
+            execute_task = asyncio.create_task(_timed(trace, "round_trip_search", round_trip_search(round_trip)))
+            pipeline_tasks.append(execute_task)
+        else:
+            sql_task = asyncio.create_task(_timed(trace, "generate_sql", generate_sql(question, trace)))
+            pipeline_tasks.append(sql_task)
+
+        policy_tasks = {}
+        luggage_task = None
+        if intents.luggage:
+            luggage_task = asyncio.create_task(
+                _timed(trace, "extract_luggage", extract_luggage_query(question)))
+            policy_tasks = {
+                doc["name"]: asyncio.create_task(_prefetch_policy(trace, doc["name"], luggage_task))
+                for doc in documents
+            }
+            pipeline_tasks.append(luggage_task)
+            pipeline_tasks.extend(policy_tasks.values())
+
+        if round_trip:
+            # Streamed in place of SQL so the client still sees what was run
+            cleaned_query = round_trip.describe()
+        else:
+            # Step 1: Generate and verify SQL query
+            cleaned_query = await sql_task
+
+            # Step 2: Start executing the SQL query while it is streamed to the client
+            execute_task = asyncio.create_task(_timed(trace, "execute_query", execute_query(cleaned_query)))
+            pipeline_tasks.append(execute_task)
+
+        # Step 3: Stream SQL query (one event unless pacing is configured)
+        stream_start = time.perf_counter()
+        for chunk in sql_chunks(cleaned_query):
             yield json.dumps({
                 "type": "sql",
                 "content": chunk
             })
-            await asyncio.sleep(0.05)
+            if STREAM_SQL_CHUNK_DELAY_SECONDS:
+                await asyncio.sleep(STREAM_SQL_CHUNK_DELAY_SECONDS)
+        trace.record("stream_sql", time.perf_counter() - stream_start)
 
-        # Step 3: Execute SQL query
-        query_results_str = await execute_query(cleaned_query)
-
-        # Step 4: Parse query results
-        flight_data = parse_tuple_list(query_results_str)
+        columns, flight_data = await execute_task
 
+        trace.set("rows", len(flight_data))
         if not flight_data:
+            trace.set("outcome", "no_results")
             yield json.dumps({
                 "type": "error",
                 "content": "No flights found for the given route."
             })
             return
 
-        # Step 5: Extract valid airline names
-        airline_names = {flight[1] for flight in flight_data if flight[1] in VALID_AIRLINES}
-
-        # Step 6: Handle luggage-related queries
+        # Cards come straight from the rows, before policies or the LLM are awaited
+        cards_rendered = RESPONSE_MODE == "cards" and can_render_cards(columns)
+        if cards_rendered:
+            for card in render_flight_cards(columns, flight_data):
+                _mark_first_answer(trace)
+                yield json.dumps({"type": "answer", "content": card})
+
+        # Step 4: Extract valid airline names (of both legs for round trips)
+        airline_indexes = [i for i, column in enumerate(columns)
+                           if column == "airline" or column.endswith("_airline")] or [1]
+        airline_names = {flight[i] for flight in flight_data for i in airline_indexes
+                         if len(flight) > i and flight[i] in VALID_AIRLINES}
+
+        # Step 5: Collect luggage policies for the airlines in the results
+        _cancel_pending(task for airline, task in policy_tasks.items() if airline not in airline_names)
         luggage_policies = {}
-        if is_luggage_related_query(question):
-            luggage_query = await extract_luggage_query(question)
-            if luggage_query:
-                for airline in airline_names:
-                    policy = await search_policy(airline, luggage_query)
-                    luggage_policies[airline] = f"{policy} ({airline})"
-
-        # Step 7: Generate response using streaming
-        response_input = {
-            "question": question,
-            "sql_query": cleaned_query,
-            "query_result": flight_data,
-            "luggage_policies": luggage_policies
-        }
-        formatted_response_prompt = response_prompt.format(**response_input)
-
-        buffer = ""
-        current_think = False
-
-        # Step 8: Stream AI-generated response
+        luggage_query = await luggage_task if luggage_task else None
+        if luggage_query:
+            airlines = sorted(airline_names)
+            policies = await asyncio.gather(*(
+                policy_tasks[airline] if airline in policy_tasks
+                else _timed(trace, f"policy:{airline}", search_policy(airline, luggage_query))
+                for airline in airlines
+            ))
+            for airline, policy in zip(airlines, policies):
+                luggage_policies[airline] = f"{policy} ({airline})"
+
+        elapsed = trace.elapsed()
+        sequential = sum(duration for stage, duration in trace.stages.items()
+                         if stage in PRE_RESPONSE_STAGES
+                         or (stage.startswith("policy:") and stage[len("policy:"):] in luggage_policies))
+        # Reported in the timing event and on /metrics; the log level is ERROR by default
+        trace.set("pre_response_ms", round(elapsed * 1000, 3))
+        trace.set("pre_response_sequential_ms", round(sequential * 1000, 3))
+        concurrency_saved_seconds.observe(max(0.0, sequential - elapsed))
+        logger.info(
+            "Pre-response stages took %.3fs; run sequentially they would take %.3fs (saved %.3fs)",
+            elapsed, sequential, sequential - elapsed
+        )
+
+        # Step 6: Generate response using streaming (only the summary when cards were shown)
+        # Rows go to the LLM in a compact table with links replaced by short references
+        if cards_rendered:
+            encoded = encode_results(columns, flight_data, drop={"uuid", "link"})
+            formatted_response_prompt = summary_prompt.format(question=question, query_result=encoded.text)
+        else:
+            encoded = encode_results(columns, flight_data)
+            response_input = {
+                "question": question,
+                "sql_query": cleaned_query,
+                "query_result": encoded.text,
+                "luggage_policies": luggage_policies
+            }
+            formatted_response_prompt = response_prompt.format(**response_input)
+
+        answer_stream = AnswerStream(links=encoded.links)
+
+        # Step 7: Stream AI-generated response without its <think> block
+        response_start = time.perf_counter()
+        streamed = []
+        usage_chunk = None
         async for chunk in flight_llm.astream(formatted_response_prompt):
-            if isinstance(chunk, AIMessage):
-                content = chunk.content
-            else:
-                content = str(chunk)
-
-            if "<think>" in content:
-                current_think = True
-                continue
-            elif "</think>" in content:
-                current_think = False
-                continue
-
-            if current_think:
-                continue
+            if not streamed:
+                trace.record("llm_first_token", time.perf_counter() - response_start)
+            streamed.append(str(chunk.content))
+            if getattr(chunk, "usage_metadata", None):
+                usage_chunk = chunk
+            content = answer_stream.feed(chunk)
+            if content:
+                _mark_first_answer(trace)
+                yield json.dumps({"type": "answer", "content": content})
 
-            buffer += content
-
-            if re.search(r'[.,!?\s]$', buffer):
-                if buffer.strip():
-                    yield json.dumps({"type": "answer", "content": buffer})
-                buffer = ""
-
-        # Step 9: Append luggage policy at the end
+        # Send any remaining buffered content
+        content = answer_stream.finish()
+        if content:
+            _mark_first_answer(trace)
+            yield json.dumps({"type": "answer", "content": content})
+        trace.record("stream_response", time.perf_counter() - response_start)
+        trace.set("chunks_streamed", len(streamed))
+        trace.llm_call("response", *token_usage(usage_chunk, formatted_response_prompt, "".join(streamed)))
+
+        # Step 8: Append luggage policy at the end
         if luggage_policies:
             luggage_info = "\n\nLuggage Policies:\n" + "\n".join(
                 [f"- {policy}" for policy in luggage_policies.values()]
             )
+            _mark_first_answer(trace)
             yield json.dumps({"type": "answer", "content": luggage_info})
 
-        # Send any remaining buffered content
-        if buffer.strip():
-            yield json.dumps({"type": "answer", "content": buffer})
-
     except Exception as e:
         logger.error("Error in stream_response: %s", str(e))
+        trace.set("outcome", "error")
         yield json.dumps({"type": "error", "content": str(e)})
+    finally:
+        # Drop in-flight and speculative work nobody is going to use
+        _cancel_pending(pipeline_tasks)
 
 async def execute_query(query: str):
-    """Execute SQL query and return results"""
+    """Execute SQL query and return column names and result rows"""
     try:
-        return db.run(query)
+        return await run_query(query)
+    except TimeoutError as e:
+        raise HTTPException(
+            status_code=504,
+            detail=f"SQL execution error: {str(e)}"
+        ) from e
     except (SQLAlchemyError, SQLiteError) as e:
         raise HTTPException(
             status_code=500,
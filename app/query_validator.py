@@ -1,6 +1,41 @@
+from collections import Counter
+from difflib import SequenceMatcher, get_close_matches
+from functools import lru_cache
+from typing import Dict, List, NamedTuple, Set, Tuple
 
-from difflib import get_close_matches
-from typing import Set
+# Core flight-related keywords
+FLIGHT_KEYWORDS = {
+    'flight', 'air', 'airline', 'airport', 'airways',
+    'travel', 'trip', 'journey',
+    'destination', 'dest',
+    'origin', 'route', 'path', 'connection',
+    'price', 'fare', 'cost', 'expensive', 'cheap',
+    'direct', 'nonstop', 'connecting',
+    'departure', 'arrive', 'arriving', 'departing',
+    'domestic', 'international'
+}
+
+# Location indicators that strongly suggest a flight query
+LOCATION_INDICATORS = {'from', 'to', 'between', 'via'}
+
+# Core luggage-related keywords
+LUGGAGE_KEYWORDS = {
+    'luggage', 'baggage', 'bag', 'suitcase', 'carry-on',
+    'carry on', 'check-in', 'checked bag', 'hand baggage',
+    'weight', 'kg', 'kilos', 'pounds', 'lbs',
+    'dimensions', 'size', 'allowance', 'restriction',
+    'prohibited', 'forbidden', 'allowed', 'limit',
+    'overweight', 'excess', 'cabin', 'hold', 'storage',
+    'pack', 'bring', 'carry', 'transport', 'stow'
+}
+
+PRICE_SYMBOLS = ('₹', '$', '€')
+
+FUZZY_CUTOFF = 0.75
+
+class QueryIntents(NamedTuple):
+    flight: bool
+    luggage: bool
 
 def get_fuzzy_matches(word: str, vocabulary: Set[str], cutoff: float = 0.75) -> bool:
     """
@@ -8,67 +43,74 @@ def get_fuzzy_matches(word: str, vocabulary: Set[str], cutoff: float = 0.75) ->
     """
     return bool(get_close_matches(word, vocabulary, n=1, cutoff=cutoff))
 
-def is_flight_related_query(query: str) -> bool:
+@lru_cache(maxsize=1)
+def keyword_index() -> Dict[str, Tuple[Tuple[str, int], ...]]:
     """
-    Enhanced check for flight-related queries using fuzzy matching for typo tolerance
+    Character index over both keyword sets: char -> ((keyword, occurrences), ...).
+    Built once; lets a lookup bound difflib's ratio for every keyword at once.
     """
-    # Core flight-related keywords
-    flight_keywords = {
-        'flight', 'air', 'airline', 'airport', 'airways',
-        'travel', 'trip', 'journey',
-        'destination', 'dest',
-        'origin', 'route', 'path', 'connection',
-        'price', 'fare', 'cost', 'expensive', 'cheap',
-        'direct', 'nonstop', 'connecting',
-        'departure', 'arrive', 'arriving', 'departing',
-        'domestic', 'international'
-    }
-
-    # Location indicators that strongly suggest a flight query
-    location_indicators = {'from', 'to', 'between', 'via'}
-
-    # Clean and tokenize the query
-    query = query.lower().strip()
-    query_words = query.split()
-
-    # Check each word in the query for fuzzy matches
-    for word in query_words:
-        # Exact match for location indicators
-        if word in location_indicators:
-            return True
+    index: Dict[str, List[Tuple[str, int]]] = {}
+    for keyword in sorted(FLIGHT_KEYWORDS | LUGGAGE_KEYWORDS):
+        for char, count in Counter(keyword).items():
+            index.setdefault(char, []).append((keyword, count))
+    return {char: tuple(postings) for char, postings in index.items()}
 
-        # Fuzzy match for flight keywords
-        if get_fuzzy_matches(word, flight_keywords):
-            return True
+@lru_cache(maxsize=8192)
+def classify_word(word: str) -> QueryIntents:
+    """Which keyword sets a single word fuzzily matches."""
+    if word in FLIGHT_KEYWORDS or word in LUGGAGE_KEYWORDS:
+        return QueryIntents(word in FLIGHT_KEYWORDS, word in LUGGAGE_KEYWORDS)
 
-    # Check for price indicators
-    if any(char in query for char in ['₹', '$', '€']):
-        return True
+    # Characters shared with each keyword bound the matches difflib can find
+    # (its quick_ratio), so most keywords are ruled out without a SequenceMatcher
+    shared: Dict[str, int] = {}
+    index = keyword_index()
+    for char, count in Counter(word).items():
+        for keyword, keyword_count in index.get(char, ()):
+            shared[keyword] = shared.get(keyword, 0) + min(count, keyword_count)
 
-    return False
+    # Same acceptance test as difflib.get_close_matches
+    matcher = SequenceMatcher()
+    matcher.set_seq2(word)
+    flight = luggage = False
+    for keyword, matches in shared.items():
+        if 2 * matches < FUZZY_CUTOFF * (len(word) + len(keyword)):
+            continue
+        if (keyword in FLIGHT_KEYWORDS and not flight) or (keyword in LUGGAGE_KEYWORDS and not luggage):
+            matcher.set_seq1(keyword)
+            if matcher.ratio() >= FUZZY_CUTOFF:
+                flight = flight or keyword in FLIGHT_KEYWORDS
+                luggage = luggage or keyword in LUGGAGE_KEYWORDS
+    return QueryIntents(flight, luggage)
 
-def is_luggage_related_query(query: str) -> bool:
+def classify_query(query: str) -> QueryIntents:
     """
-    Check if a query is related to luggage/baggage using fuzzy matching
+    Single pass over the question that reports every intent at once, with
+    the same typo tolerance as the difflib-based checks.
     """
-    # Core luggage-related keywords
-    luggage_keywords = {
-        'luggage', 'baggage', 'bag', 'suitcase', 'carry-on',
-        'carry on', 'check-in', 'checked bag', 'hand baggage',
-        'weight', 'kg', 'kilos', 'pounds', 'lbs',
-        'dimensions', 'size', 'allowance', 'restriction',
-        'prohibited', 'forbidden', 'allowed', 'limit',
-        'overweight', 'excess', 'cabin', 'hold', 'storage',
-        'pack', 'bring', 'carry', 'transport', 'stow'
-    }
-
-    # Clean and tokenize the query
     query = query.lower().strip()
-    query_words = query.split()
+    flight = any(symbol in query for symbol in PRICE_SYMBOLS)
+    luggage = False
 
-    # Check each word in the query for fuzzy matches
-    for word in query_words:
-        if get_fuzzy_matches(word, luggage_keywords):
-            return True
+    for word in query.split():
+        if word in LOCATION_INDICATORS:
+            flight = True
+        intents = classify_word(word)
+        flight = flight or intents.flight
+        luggage = luggage or intents.luggage
+        if flight and luggage:
+            break
 
-    return False
\ No newline at end of file
+    return QueryIntents(flight, luggage)
+
+def is_flight_related_query(query: str) -> bool:
+    """
+    Enhanced check for flight-related queries using fuzzy matching for typo tolerance
+    """
+    return classify_query(query).flight
+
+def is_luggage_related_query(query: str) -> bool:
+    """
+    Check if a query is related to luggage/baggage using fuzzy matching
+    """
+    return classify_query(query).luggage
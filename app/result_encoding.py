@@ -0,0 +1,94 @@
+import re
+from typing import Collection, Dict, NamedTuple, Sequence
+
+# Columns the LLM never needs to see
+DROPPED_COLUMNS = {"uuid"}
+
+# A link reference ("L3") on its own, e.g. the target of [Book Now](L3)
+LINK_REF = re.compile(r'(?<![\w/])(L\d+)(?!\w)')
+# Text at the end of a chunk that could still grow into a link reference
+_PARTIAL_REF = re.compile(r'(?<![\w/])L\d*$')
+
+class EncodedResults(NamedTuple):
+    text: str
+    links: Dict[str, str]
+
+def is_link_column(column: str) -> bool:
+    return column == "link" or column.endswith("_link")
+
+def _cell(value) -> str:
+    if value is None:
+        return ""
+    if isinstance(value, float):
+        return f"{value:g}"
+    return str(value).replace("|", "/").replace("\n", " ")
+
+def encode_results(columns: Sequence[str], rows: Sequence[tuple],
+                   drop: Collection[str] = DROPPED_COLUMNS) -> EncodedResults:
+    """
+    Compact text form of query results for an LLM prompt: unused columns are
+    dropped, every link is replaced by a short reference ("L1", "L2", ...)
+    returned in `links`, values shared by every row are stated once, and the
+    remaining columns are laid out as a table with one line per row.
+    """
+    if not rows:
+        return EncodedResults("[]", {})
+    keep = [i for i, column in enumerate(columns) if column not in drop]
+    links: Dict[str, str] = {}
+    refs: Dict[str, str] = {}
+    table = []
+    for row in rows:
+        cells = []
+        for i in keep:
+            value = row[i]
+            if is_link_column(columns[i]) and value:
+                ref = refs.setdefault(value, f"L{len(refs) + 1}")
+                links[ref] = value
+                value = ref
+            cells.append(_cell(value))
+        table.append(cells)
+
+    shared = [j for j, i in enumerate(keep)
+              if len(table) > 1 and not is_link_column(columns[i]) and len({cells[j] for cells in table}) == 1]
+    varying = [j for j in range(len(keep)) if j not in shared]
+
+    lines = [f"{len(table)} rows."]
+    if shared:
+        lines.append("Same for every row: " + ", ".join(f"{columns[keep[j]]}={table[0][j]}" for j in shared))
+    lines.append(" | ".join(columns[keep[j]] for j in varying))
+    lines.extend(" | ".join(cells[j] for j in varying) for cells in table)
+    return EncodedResults("\n".join(lines), links)
+
+class LinkExpander:
+    """
+    Puts the real URLs back in place of link references in a token stream.
+    A reference split across chunks is held back until it is complete.
+    """
+
+    def __init__(self, links: Dict[str, str]):
+        self.links = links
+        self._pending = ""
+        # Last character already emitted: "XL1" split as "X" + "L1" is not a reference
+        self._previous = ""
+
+    def _expand(self, text: str) -> str:
+        work = self._previous + text
+        skip = len(self._previous)
+        expanded = LINK_REF.sub(
+            lambda match: match.group(0) if match.start() < skip else self.links.get(match.group(1), match.group(1)),
+            work)
+        self._previous = work[-1:]
+        return expanded[skip:]
+
+    def feed(self, text: str) -> str:
+        if not self.links:
+            return text
+        data = self._pending + text
+        partial = _PARTIAL_REF.search(self._previous + data, len(self._previous))
+        cut = partial.start() - len(self._previous) if partial else len(data)
+        self._pending = data[cut:]
+        return self._expand(data[:cut]) if cut else ""
+
+    def finish(self) -> str:
+        pending, self._pending = self._pending, ""
+        return self._expand(pending) if pending else ""
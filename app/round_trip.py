@@ -0,0 +1,225 @@
+import asyncio
+import heapq
+import re
+from bisect import bisect_left, bisect_right
+from typing import Dict, List, NamedTuple, Optional, Sequence, Tuple
+from cities import CITIES
+from normalize_question import normalize_question, CITY_TOKENS
+from sql_templates import FILLER_WORDS, CHEAPEST_WORDS, PRICE_WORDS, LIMIT_WORDS
+from async_db import run_query
+from config import SQL_TOP_K, ROUND_TRIP_MIN_GAP_DAYS
+
+# Columns each leg is loaded with, and how they are named in a result row
+LEG_COLUMNS = ("airline", "date", "duration", "flightType", "price_inr", "link")
+SOURCE_SQL = (f"SELECT origin, destination, date_ordinal, {', '.join(LEG_COLUMNS)} FROM flights "
+              "WHERE date_ordinal IS NOT NULL AND price_inr IS NOT NULL")
+ROUND_TRIP_COLUMNS = (("origin", "destination")
+                      + tuple(f"outbound_{column}" for column in LEG_COLUMNS)
+                      + tuple(f"return_{column}" for column in LEG_COLUMNS)
+                      + ("gap_days", "total_price_inr"))
+
+_CITY_NAMES = {name.lower().replace(' ', '_'): name for name in CITIES}
+
+TRIP_WORDS = {'round', 'trip', 'trips', 'roundtrip', 'return', 'returns', 'returning', 'both', 'ways', 'back'}
+GAP_WORDS = {'gap', 'day', 'days', 'later', 'after', 'stay', 'apart', 'between', 'and', 'at', 'least', 'most',
+             'minimum', 'min', 'maximum', 'max', 'within', 'no', 'more', 'less', 'fewer', 'than', 'or', 'up', 'upto',
+             'to', 'exactly'}
+# Words that ask for the cheapest pairs; 'least'/'most' alone belong to gap phrases
+# ("at least 7 days") and never make a question one for a single cheapest pair
+CHEAPEST_PAIR_WORDS = {'cheapest', 'cheap', 'lowest', 'affordable', 'economical', 'budget'}
+OTHER_WORDS = {'which', 'should', 'be', 'flight', 'flights', 'options', 'sorted', 'total'}
+KNOWN_WORDS = FILLER_WORDS | CHEAPEST_WORDS | PRICE_WORDS | LIMIT_WORDS | TRIP_WORDS | GAP_WORDS | OTHER_WORDS
+
+class RoundTripQuery(NamedTuple):
+    origin: str
+    destination: str
+    min_gap: int
+    max_gap: Optional[int]
+    limit: int
+
+    def describe(self) -> str:
+        """Stands in for the SQL statement in the stream, since none is run."""
+        if self.max_gap is None:
+            gap = f"at least {self.min_gap} day{'s' if self.min_gap != 1 else ''}"
+        elif self.max_gap == self.min_gap:
+            gap = f"exactly {self.min_gap} day{'s' if self.min_gap != 1 else ''}"
+        else:
+            gap = f"{self.min_gap}-{self.max_gap} days"
+        return (f"-- Round trip search: {self.origin} to {self.destination} and back, "
+                f"return {gap} after departure, {self.limit} cheapest by total price")
+
+def _gap(tokens: List[str]) -> Optional[Tuple[int, Optional[int], Optional[int]]]:
+    """(min_gap, max_gap, limit) from the question's numbers, or None if one is not understood."""
+    min_gap, max_gap, limit = ROUND_TRIP_MIN_GAP_DAYS, None, None
+    numbers = [i for i, token in enumerate(tokens) if token.isdigit()]
+    i = 0
+    while i < len(numbers):
+        position = numbers[i]
+        value = int(tokens[position])
+        previous = tokens[position - 1] if position else ''
+        pair = tokens[max(0, position - 2):position]
+        if previous in LIMIT_WORDS:
+            limit = value
+            i += 1
+            continue
+
+        # "5 to 10 days", "between 5 and 10 days", "5-10 days"
+        upper = numbers[i + 1] if i + 1 < len(numbers) else None
+        if upper is not None and set(tokens[position + 1:upper]) <= {'to', 'and'} and upper - position <= 2:
+            position, i = upper, i + 1
+            min_gap, max_gap = value, int(tokens[upper])
+        elif (tokens[max(0, position - 3):position] == ['no', 'more', 'than'] or pair in (['at', 'most'], ['up', 'to'])
+              or previous in {'within', 'max', 'maximum', 'upto'}):
+            max_gap = value
+        elif pair == ['more', 'than']:
+            min_gap = value + 1
+        elif pair in (['less', 'than'], ['fewer', 'than']):
+            max_gap = value - 1
+        elif previous == 'exactly':
+            min_gap = max_gap = value
+        else:
+            # "at least 7 days", "7 days gap", "7 days later", "minimum 7 days"
+            min_gap = value
+        if tokens[position + 1:position + 2] not in (['day'], ['days']):
+            return None
+        i += 1
+    if max_gap is not None and max_gap < min_gap:
+        return None
+    return min_gap, max_gap, limit
+
+def parse_round_trip(question: str) -> Optional[RoundTripQuery]:
+    """
+    A round-trip search ("cheapest return flight between X and Y with at least
+    7 days gap") as a RoundTripQuery, or None for anything else. Like
+    sql_templates.compile_question, any word or number it does not account
+    for leaves the question to the SQL path.
+    """
+    tokens = normalize_question(question).split()
+    words = {token for token in tokens if token not in CITY_TOKENS and not token.isdigit()}
+    if not tokens or words - KNOWN_WORDS:
+        return None
+
+    cities = list(dict.fromkeys(token for token in tokens if token in CITY_TOKENS))
+    # "from X to Y ... from Y to X" is a round trip even without the words for one
+    reversed_legs = sum(1 for i, token in enumerate(tokens[:-1]) if token == 'from' and tokens[i + 1] in cities) == 2
+    joined = ' '.join(tokens)
+    marked = bool(re.search(r'\b(round trips?|roundtrip|return|returning|both ways|and back)\b', joined))
+    if len(cities) != 2 or not (marked or reversed_legs):
+        return None
+    # The search only ranks pairs from the cheapest up
+    if 'highest' in words or any(token == 'expensive' and tokens[i - 1:i] != ['least']
+                                 for i, token in enumerate(tokens)):
+        return None
+
+    gap = _gap(tokens)
+    if gap is None:
+        return None
+    min_gap, max_gap, limit = gap
+
+    if limit is None:
+        plural = bool(words & {'flights', 'trips', 'options', 'returns', 'fares', 'prices'})
+        cheapest = bool(words & CHEAPEST_PAIR_WORDS) or 'least' in words and 'expensive' in words
+        limit = 1 if cheapest and not plural else SQL_TOP_K
+    return RoundTripQuery(_CITY_NAMES[cities[0]], _CITY_NAMES[cities[1]], min_gap, max_gap, limit)
+
+class RouteFares:
+    """
+    One route's fares sorted by day, with a sparse table answering "cheapest
+    fare between positions l and r" in O(1) after O(n log n) preprocessing.
+    """
+
+    def __init__(self, fares: Sequence[Tuple[int, int, tuple]]):
+        fares = sorted(fares, key=lambda fare: (fare[0], fare[1]))
+        self.days = [day for day, _, _ in fares]
+        self.prices = [price for _, price, _ in fares]
+        self.legs = [leg for _, _, leg in fares]
+        # levels[j][i]: position of the cheapest fare in [i, i + 2**j)
+        self.levels = [list(range(len(fares)))]
+        width = 1
+        while 2 * width <= len(fares):
+            previous = self.levels[-1]
+            self.levels.append([min(previous[i], previous[i + width], key=self.prices.__getitem__)
+                                for i in range(len(fares) - 2 * width + 1)])
+            width *= 2
+
+    def __len__(self) -> int:
+        return len(self.days)
+
+    def cheapest(self, left: int, right: int) -> int:
+        """Position of the cheapest fare in [left, right] (inclusive)."""
+        level = (right - left + 1).bit_length() - 1
+        candidates = self.levels[level]
+        return min(candidates[left], candidates[right - (1 << level) + 1], key=self.prices.__getitem__)
+
+    def window(self, start_day: int, end_day: Optional[int]) -> Tuple[int, int]:
+        """Positions of the fares from start_day through end_day (open-ended when None)."""
+        left = bisect_left(self.days, start_day)
+        right = (bisect_right(self.days, end_day) if end_day is not None else len(self.days)) - 1
+        return left, right
+
+class RoundTripIndex:
+    """Fares of every route, for pairing outbound and return flights without a self-join."""
+
+    def __init__(self, columns: Sequence[str], rows: Sequence[tuple]):
+        position = {column: i for i, column in enumerate(columns)}
+        legs = [position[column] for column in LEG_COLUMNS]
+        by_route: Dict[Tuple[str, str], List[Tuple[int, int, tuple]]] = {}
+        for row in rows:
+            route = (row[position["origin"]], row[position["destination"]])
+            fare = (int(row[position["date_ordinal"]]), int(row[position["price_inr"]]), tuple(row[i] for i in legs))
+            by_route.setdefault(route, []).append(fare)
+        self.routes = {route: RouteFares(fares) for route, fares in by_route.items()}
+
+    def search(self, query: RoundTripQuery) -> List[tuple]:
+        """
+        The `limit` cheapest (outbound, return) pairs whose return is min_gap to
+        max_gap days after the outbound, as ROUND_TRIP_COLUMNS rows. Each
+        outbound's cheapest return in its window seeds a heap; taking a pair
+        splits that window around it, so k pairs cost O((n + k) log n).
+        """
+        outbound = self.routes.get((query.origin, query.destination))
+        inbound = self.routes.get((query.destination, query.origin))
+        if not outbound or not inbound:
+            return []
+
+        heap = []
+        for i, day in enumerate(outbound.days):
+            left, right = inbound.window(day + query.min_gap,
+                                         day + query.max_gap if query.max_gap is not None else None)
+            if left <= right:
+                j = inbound.cheapest(left, right)
+                heap.append((outbound.prices[i] + inbound.prices[j], i, j, left, right))
+        heapq.heapify(heap)
+
+        pairs = []
+        while heap and len(pairs) < query.limit:
+            total, i, j, left, right = heapq.heappop(heap)
+            pairs.append((query.origin, query.destination) + outbound.legs[i] + inbound.legs[j]
+                         + (inbound.days[j] - outbound.days[i], total))
+            for low, high in ((left, j - 1), (j + 1, right)):
+                if low <= high:
+                    k = inbound.cheapest(low, high)
+                    heapq.heappush(heap, (outbound.prices[i] + inbound.prices[k], i, k, low, high))
+        return pairs
+
+# Built from the flights table on the first round-trip search; see invalidate_round_trip_index
+_index: Optional[RoundTripIndex] = None
+_index_lock = asyncio.Lock()
+
+def invalidate_round_trip_index() -> None:
+    """Rebuild the index on the next search, e.g. after flights are reloaded."""
+    global _index
+    _index = None
+
+async def get_round_trip_index() -> RoundTripIndex:
+    global _index
+    async with _index_lock:
+        if _index is None:
+            columns, rows = await run_query(SOURCE_SQL)
+            _index = RoundTripIndex(columns, rows)
+    return _index
+
+async def round_trip_search(query: RoundTripQuery) -> Tuple[List[str], List[tuple]]:
+    """Columns and rows of the cheapest round trips, shaped like execute_query's result."""
+    index = await get_round_trip_index()
+    return list(ROUND_TRIP_COLUMNS), index.search(query)
@@ -0,0 +1,50 @@
+import hashlib
+from typing import Callable, Dict, List, Optional, Tuple
+from config import engine
+
+def schema_cookie() -> int:
+    """SQLite's schema cookie; it changes whenever the flights database schema does."""
+    with engine.connect() as conn:
+        return conn.exec_driver_sql("PRAGMA schema_version").scalar()
+
+def schema_fingerprint() -> str:
+    """Hash of every table and index definition in the flights database."""
+    with engine.connect() as conn:
+        ddl = conn.exec_driver_sql(
+            "SELECT type, name, sql FROM sqlite_master ORDER BY type, name"
+        ).fetchall()
+    return hashlib.sha256(repr(ddl).encode('utf-8')).hexdigest()
+
+class CachedTableInfo:
+    """
+    Stands in for a SQLDatabase wherever only the dialect and table info are
+    needed (e.g. create_sql_query_chain). The rendered table info, which
+    costs schema reflection plus sample-row queries, is reused until the
+    schema cookie changes or `invalidate` is called after a data reload.
+    `get_database` returns the SQLDatabase, which is only reflected when
+    table info is first needed.
+    """
+
+    def __init__(self, get_database: Callable, cookie: Callable[[], int] = schema_cookie):
+        self.get_database = get_database
+        self._cookie_of_schema = cookie
+        self._cookie = None
+        self._table_info: Dict[Optional[Tuple[str, ...]], str] = {}
+
+    @property
+    def dialect(self) -> str:
+        return self.get_database().dialect
+
+    def invalidate(self) -> None:
+        self._table_info.clear()
+
+    def get_table_info(self, table_names: Optional[List[str]] = None) -> str:
+        cookie = self._cookie_of_schema()
+        if cookie != self._cookie:
+            self._table_info.clear()
+            self._cookie = cookie
+
+        key = tuple(sorted(table_names)) if table_names else None
+        if key not in self._table_info:
+            self._table_info[key] = self.get_database().get_table_info(table_names=table_names)
+        return self._table_info[key]
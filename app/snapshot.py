@@ -0,0 +1,97 @@
+import hashlib
+import os
+import time
+from pathlib import Path
+from sqlalchemy import create_engine, event
+from database import bulk_load_flights, migrate_flights_schema
+
+# Bump when the snapshot layout changes so a new version is built from the same data
+SNAPSHOT_FORMAT = 1
+# Name of the file in a snapshot directory that names the snapshot to serve
+CURRENT_FILE = 'CURRENT'
+
+def snapshot_version(json_file) -> str:
+    """Version of a snapshot built from this JSON: its content hash plus the layout format."""
+    digest = hashlib.sha256(f"format={SNAPSHOT_FORMAT}\n".encode('utf-8'))
+    with open(json_file, 'rb') as file:
+        for block in iter(lambda: file.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()[:16]
+
+def _write_current(snapshot_dir: Path, name: str) -> None:
+    temp = snapshot_dir / f"{CURRENT_FILE}.tmp"
+    temp.write_text(name + "\n", encoding='utf-8')
+    os.replace(temp, snapshot_dir / CURRENT_FILE)
+
+def build_snapshot(json_file, snapshot_dir) -> Path:
+    """
+    Build a read-only flights database from the JSON dump: bulk loaded, typed
+    columns filled, route indexes created, statistics gathered (ANALYZE) and
+    compacted, with the version recorded in a snapshot_meta table. The file
+    is named after its version, made read-only, and published by rewriting
+    CURRENT, so servers reading an older snapshot are never disturbed.
+    Building an existing version only republishes it.
+    """
+    snapshot_dir = Path(snapshot_dir)
+    snapshot_dir.mkdir(parents=True, exist_ok=True)
+    version = snapshot_version(json_file)
+    target = snapshot_dir / f"flights-{version}.db"
+    if target.exists():
+        _write_current(snapshot_dir, target.name)
+        return target
+
+    temp = target.with_suffix('.db.tmp')
+    for leftover in (temp, Path(f"{temp}-wal"), Path(f"{temp}-shm")):
+        leftover.unlink(missing_ok=True)
+
+    row_count = bulk_load_flights(json_file, temp)
+    if row_count is None:
+        raise ValueError(f"Could not load flights from {json_file}")
+    migrate_flights_schema(temp)
+
+    engine = create_engine(f'sqlite:///{temp}')
+    try:
+        with engine.begin() as conn:
+            conn.exec_driver_sql(
+                'CREATE TABLE snapshot_meta (key TEXT PRIMARY KEY, value TEXT NOT NULL)')
+            conn.exec_driver_sql(
+                'INSERT INTO snapshot_meta (key, value) VALUES (?, ?), (?, ?), (?, ?), (?, ?)',
+                ('version', version, 'format', str(SNAPSHOT_FORMAT),
+                 'rows', str(row_count), 'built_at', time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime())))
+            conn.exec_driver_sql('ANALYZE')
+        # Immutable databases cannot use WAL, and VACUUM must run outside a transaction
+        with engine.connect() as conn:
+            conn.exec_driver_sql('PRAGMA journal_mode=DELETE')
+            conn.exec_driver_sql('VACUUM')
+    finally:
+        engine.dispose()
+
+    os.chmod(temp, 0o444)
+    os.replace(temp, target)
+    _write_current(snapshot_dir, target.name)
+    return target
+
+def resolve_snapshot(path) -> Path:
+    """The snapshot file for a path: the file itself, or the one CURRENT names in a directory."""
+    path = Path(path)
+    if path.is_dir():
+        path = path / (path / CURRENT_FILE).read_text(encoding='utf-8').strip()
+    if not path.is_file():
+        raise FileNotFoundError(f"Flights snapshot not found: {path}")
+    return path.absolute()
+
+def snapshot_url(path) -> str:
+    """
+    SQLAlchemy URL opening a snapshot read-only and immutable: SQLite takes no
+    locks and never checks for changes, so any number of worker processes
+    can share the file (and, with memory mapping, its pages).
+    """
+    return f"sqlite:///file:{resolve_snapshot(path).as_posix()}?mode=ro&immutable=1&uri=true"
+
+def enable_mmap(engine, size: int) -> None:
+    """Read the database through a shared memory map of up to `size` bytes."""
+    @event.listens_for(engine, "connect")
+    def _set_mmap_size(dbapi_connection, _connection_record):
+        cursor = dbapi_connection.cursor()
+        cursor.execute(f"PRAGMA mmap_size = {int(size)}")
+        cursor.close()
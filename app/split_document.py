@@ -0,0 +1,50 @@
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+from typing import TYPE_CHECKING, List, Sequence
+
+if TYPE_CHECKING:
+    import tiktoken
+
+@lru_cache(maxsize=None)
+def get_encoder(model: str = "text-embedding-ada-002") -> "tiktoken.Encoding":
+    """Tokenizer for the embedding model, built once per process (and only
+    imported when documents are first split)."""
+    import tiktoken
+    return tiktoken.encoding_for_model(model)
+
+def split_document(text: str, max_tokens: int = 500) -> List[str]:
+    enc = get_encoder()
+
+    chunks = []
+    current_chunk = []
+    current_size = 0
+
+    # Split into sentences (basic implementation)
+    sentences = [sentence.strip() + '. ' for sentence in text.replace('\n', ' ').split('. ')]
+
+    # Tokenize every sentence in one batch call instead of one call per sentence
+    token_counts = [len(tokens) for tokens in enc.encode_batch(sentences)]
+
+    for sentence, sentence_tokens in zip(sentences, token_counts):
+        if current_size + sentence_tokens > max_tokens:
+            # Join the current chunk and add to chunks
+            chunks.append(''.join(current_chunk))
+            current_chunk = [sentence]
+            current_size = sentence_tokens
+        else:
+            current_chunk.append(sentence)
+            current_size += sentence_tokens
+
+    # Add the last chunk if it exists
+    if current_chunk:
+        chunks.append(''.join(current_chunk))
+
+    return chunks
+
+def split_documents(texts: Sequence[str], max_tokens: int = 500, workers: int = 1) -> List[List[str]]:
+    """Split several documents, in a process pool when workers > 1."""
+    if workers <= 1 or len(texts) < 2:
+        return [split_document(text, max_tokens) for text in texts]
+
+    with ProcessPoolExecutor(max_workers=min(workers, len(texts))) as pool:
+        return list(pool.map(split_document, texts, [max_tokens] * len(texts)))
@@ -0,0 +1,204 @@
+import hashlib
+import sqlite3
+import time
+from collections import OrderedDict
+from contextlib import closing
+from typing import Callable, Dict, FrozenSet, Optional, Set, Tuple
+from sqlite3 import Error as SQLiteError
+from sqlalchemy.exc import SQLAlchemyError
+from normalize_question import normalize_question, question_entities
+from schema_version import schema_cookie, schema_fingerprint
+from sql_prompt import sql_prompt
+from config import (
+    logger, SQL_CACHE_PATH, SQL_CACHE_MAX_ENTRIES, SQL_CACHE_TTL_SECONDS,
+    SQL_CACHE_FUZZY, SQL_CACHE_FUZZY_THRESHOLD
+)
+
+# Words that never change what a question asks for. Every other word (filters
+# such as "direct", sort and price words, "flight" vs "flights") must match
+# exactly before a near-duplicate question may reuse cached SQL
+FUZZY_IGNORED_WORDS = {
+    'what', 'whats', 's', 'is', 'are', 'the', 'a', 'an', 'me', 'show', 'find', 'list', 'give', 'get',
+    'search', 'display', 'please', 'i', 'want', 'need', 'can', 'you', 'there', 'available',
+}
+
+def fuzzy_signature(normalized: str) -> Tuple[Tuple[str, ...], FrozenSet[str]]:
+    """Questions may share cached SQL by fuzzy lookup only when these are equal."""
+    return question_entities(normalized), frozenset(set(normalized.split()) - FUZZY_IGNORED_WORDS)
+
+def sql_cache_fingerprint() -> str:
+    """Cached SQL is only valid for one flights schema and one SQL prompt."""
+    prompt_digest = hashlib.sha256(sql_prompt.template.encode('utf-8')).hexdigest()
+    return f"{schema_fingerprint()}:{prompt_digest}"
+
+class SQLCache:
+    """
+    LRU + TTL cache of verified SQL keyed on the normalized question,
+    optionally persisted to a SQLite file and invalidated whenever the
+    flights schema (or the SQL prompt) changes.
+    """
+
+    def __init__(self, path: Optional[str], max_entries: int, ttl_seconds: float,
+                 fuzzy: bool = False, fuzzy_threshold: float = 0.9,
+                 fingerprint: Callable[[], str] = sql_cache_fingerprint):
+        self.path = path
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.fuzzy = fuzzy
+        self.fuzzy_threshold = fuzzy_threshold
+        self._fingerprint_of_schema = fingerprint
+        self._cookie = None
+        self._fingerprint = None
+        self._entries: "OrderedDict[str, Tuple[str, float]]" = OrderedDict()
+        self._by_signature: Dict[Tuple[Tuple[str, ...], FrozenSet[str]], Set[str]] = {}
+        self._loaded = False
+        self.hits = 0
+        self.fuzzy_hits = 0
+        self.misses = 0
+
+    def get(self, question: str) -> Optional[str]:
+        """Return cached SQL for the question, or None on a miss."""
+        self._check_schema()
+        key = normalize_question(question)
+        entry = self._lookup(key)
+
+        if entry is None and self.fuzzy:
+            near_key = self._nearest(key)
+            if near_key is not None:
+                entry = self._lookup(near_key)
+                if entry is not None:
+                    self.fuzzy_hits += 1
+
+        if entry is None:
+            self.misses += 1
+            return None
+
+        self.hits += 1
+        return entry
+
+    def put(self, question: str, sql: str) -> None:
+        """Store verified SQL for the question."""
+        self._check_schema()
+        key = normalize_question(question)
+        if not key or not self._loaded:
+            return
+
+        created_at = time.time()
+        self._remember(key, sql, created_at)
+        self._execute(
+            "INSERT OR REPLACE INTO sql_cache (key, sql, schema, created_at) VALUES (?, ?, ?, ?)",
+            (key, sql, self._fingerprint, created_at)
+        )
+
+        while len(self._entries) > self.max_entries:
+            evicted, _ = self._entries.popitem(last=False)
+            self._forget(evicted)
+
+    def invalidate(self) -> None:
+        """Drop every cached query."""
+        self._entries.clear()
+        self._by_signature.clear()
+        self._execute("DELETE FROM sql_cache")
+
+    def stats(self) -> Dict[str, float]:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "fuzzy_hits": self.fuzzy_hits,
+            "misses": self.misses,
+            "hit_ratio": self.hits / lookups if lookups else 0.0,
+        }
+
+    def _lookup(self, key: str) -> Optional[str]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+
+        sql, created_at = entry
+        if time.time() - created_at > self.ttl_seconds:
+            self._forget(key)
+            return None
+
+        self._entries.move_to_end(key)
+        return sql
+
+    def _nearest(self, key: str) -> Optional[str]:
+        """Closest cached question by token Jaccard among those with the same
+        cities, numbers and filter words, differing only in FUZZY_IGNORED_WORDS."""
+        tokens = set(key.split())
+        best_key, best_score = None, self.fuzzy_threshold
+        for candidate in self._by_signature.get(fuzzy_signature(key), ()):
+            candidate_tokens = set(candidate.split())
+            score = len(tokens & candidate_tokens) / len(tokens | candidate_tokens)
+            if score >= best_score:
+                best_key, best_score = candidate, score
+        return best_key
+
+    def _remember(self, key: str, sql: str, created_at: float) -> None:
+        self._entries[key] = (sql, created_at)
+        self._entries.move_to_end(key)
+        self._by_signature.setdefault(fuzzy_signature(key), set()).add(key)
+
+    def _forget(self, key: str) -> None:
+        self._entries.pop(key, None)
+        keys = self._by_signature.get(fuzzy_signature(key))
+        if keys is not None:
+            keys.discard(key)
+        self._execute("DELETE FROM sql_cache WHERE key = ?", (key,))
+
+    def _check_schema(self) -> None:
+        """Load the persisted cache on first use and drop it when the schema changes."""
+        try:
+            cookie = schema_cookie()
+            if self._loaded and cookie == self._cookie:
+                return
+            fingerprint = self._fingerprint_of_schema()
+        except (SQLAlchemyError, SQLiteError) as e:
+            logger.warning("Could not read flights schema version: %s", str(e))
+            return
+
+        self._cookie = cookie
+        if self._loaded and fingerprint == self._fingerprint:
+            return
+
+        if self._loaded:
+            logger.info("Flights schema changed, invalidating SQL cache")
+            self._entries.clear()
+            self._by_signature.clear()
+
+        self._fingerprint = fingerprint
+        self._loaded = True
+        self._load()
+
+    def _load(self) -> None:
+        self._execute(
+            "CREATE TABLE IF NOT EXISTS sql_cache ("
+            "key TEXT PRIMARY KEY, sql TEXT NOT NULL, schema TEXT NOT NULL, created_at REAL NOT NULL)"
+        )
+        self._execute("DELETE FROM sql_cache WHERE schema != ? OR created_at < ?",
+                      (self._fingerprint, time.time() - self.ttl_seconds))
+        rows = self._execute(
+            "SELECT key, sql, created_at FROM sql_cache ORDER BY created_at DESC LIMIT ?",
+            (self.max_entries,)
+        )
+        for key, sql, created_at in reversed(rows):
+            self._remember(key, sql, created_at)
+
+    def _execute(self, statement: str, params: tuple = ()) -> list:
+        if not self.path:
+            return []
+        try:
+            with closing(sqlite3.connect(self.path)) as conn, conn:
+                return conn.execute(statement, params).fetchall()
+        except sqlite3.Error as e:
+            logger.warning("SQL cache storage error: %s", str(e))
+            return []
+
+sql_cache = SQLCache(
+    path=SQL_CACHE_PATH,
+    max_entries=SQL_CACHE_MAX_ENTRIES,
+    ttl_seconds=SQL_CACHE_TTL_SECONDS,
+    fuzzy=SQL_CACHE_FUZZY,
+    fuzzy_threshold=SQL_CACHE_FUZZY_THRESHOLD,
+)
@@ -1,27 +1,35 @@
-from langchain.prompts import PromptTemplate
+from langchain_core.prompts import PromptTemplate
+
+# Routes served in both directions; rendered into the prompt and used by
+# sql_validator to check the cities a generated query filters on
+ALLOWED_ROUTES = [
+    ("New Delhi", "Hanoi"),
+    ("New Delhi", "Ho Chi Minh City"),
+    ("Mumbai", "Hanoi"),
+    ("Mumbai", "Ho Chi Minh City"),
+    ("Bangalore", "Ho Chi Minh City"),
+    ("Kolkata", "Hanoi"),
+    ("Kolkata", "Ho Chi Minh City"),
+    ("Ahmedabad", "Hanoi"),
+    ("Ahmedabad", "Ho Chi Minh City"),
+    ("Ahmedabad", "Da Nang"),
+]
+
+ALLOWED_ROUTES_STR = "\n".join(f"- {origin} ↔ {destination}" for origin, destination in ALLOWED_ROUTES)
 
 sql_prompt = PromptTemplate(
     input_variables=["input", "top_k", "table_info"],
-    template="""
+    template=f"""
 Convert the user's flight search request into a comprehensive SQL query based on the rules below.
 
-User Input: {input}
-Top Results to Retrieve: {top_k}
+User Input: {{input}}
+Top Results to Retrieve: {{top_k}}
 
 Allowed Routes:
-- New Delhi ↔ Hanoi
-- New Delhi ↔ Ho Chi Minh City
-- Mumbai ↔ Hanoi
-- Mumbai ↔ Ho Chi Minh City
-- Bangalore ↔ Ho Chi Minh City
-- Kolkata ↔ Hanoi
-- Kolkata ↔ Ho Chi Minh City
-- Ahmedabad ↔ Hanoi
-- Ahmedabad ↔ Ho Chi Minh City
-- Ahmedabad ↔ Da Nang
+{ALLOWED_ROUTES_STR}
 
 Database Schema:
-{table_info}
+{{table_info}}
 
 Query Generation Rules:
 1.  **Column Selection:** Always select all available columns: `uuid, airline, date, duration, flightType, price_inr, origin, destination, link, rainProbability, freeMeal`.
@@ -30,7 +38,9 @@ Query Generation Rules:
 4.  **Weather Filter:** If the user specifies a condition on rain or weather (e.g., "low chance of rain"), use the `rainProbability` column. For example, for a low chance of rain, you might use `WHERE rainProbability < 40`.
 5.  **Direct Flights:** For "direct" or "non-stop" flight requests, match ANY of these values in the `flightType` column: 'Nonstop', 'Direct', 'Non-stop', 'Non stop', 'Direct flight'.
 6.  **Sorting:** If the user asks for the "cheapest" or "best price," add `ORDER BY price_inr ASC`.
-7.  **Limit:** Always limit the number of results to `{top_k}`.
+7.  **Limit:** Always limit the number of results to `{{top_k}}`.
+8.  **Typed Columns:** `date_ordinal` is the flight date as a day number (consecutive days differ by 1) and `duration_minutes` is the duration in minutes. Use `date_ordinal` for date gaps and ranges (e.g. `r.date_ordinal - o.date_ordinal >= 7`) and `duration_minutes` to filter or sort by duration, instead of parsing `date` or `duration` strings.
+9.  **Indexes:** Always filter on `origin` and `destination` when the route is known, so the (origin, destination, date), (origin, destination, date_ordinal) and (origin, destination, price_inr) indexes can be used.
 
 STRICTLY output only the SQL query. Do not include any additional information, comments, or explanations.
 """
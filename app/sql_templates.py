@@ -0,0 +1,225 @@
+from typing import Dict, List, NamedTuple, Optional, Tuple
+from sqlalchemy import text
+from cities import CITIES
+from normalize_question import normalize_question, CITY_TOKENS
+from config import engine, SQL_TOP_K
+
+# Same column list and flightType values the SQL prompt asks the LLM to use
+COLUMNS = "uuid, airline, date, duration, flightType, price_inr, origin, destination, link, rainProbability, freeMeal"
+DIRECT_FLIGHT_TYPES = "('Nonstop', 'Direct', 'Non-stop', 'Non stop', 'Direct flight')"
+
+# Rain threshold for "low chance of rain", as in the prompt's example
+LOW_RAIN_THRESHOLD = 40
+
+_CITY_NAMES = {name.lower().replace(' ', '_'): name for name in CITIES}
+
+# Words that carry no slot. A question containing any word outside this set
+# and the slot words below, or a slot word outside a phrase compile_question
+# understands, is left to the LLM.
+FILLER_WORDS = {
+    'what', 'whats', 's', 'is', 'are', 'the', 'a', 'an', 'me', 'show', 'find', 'list', 'give', 'get',
+    'search', 'display', 'all', 'available', 'any', 'flight', 'flights', 'from', 'to', 'please',
+    'i', 'want', 'need', 'options', 'option', 'which', 'can', 'you', 'there', 'for', 'on',
+    'by', 'in', 'of', 'one', 'ones', 'only', 'that', 'have', 'has', 'with', 'and',
+}
+CHEAPEST_WORDS = {'cheapest', 'lowest', 'cheap', 'least', 'best', 'most', 'affordable', 'economical', 'budget'}
+PRICE_WORDS = {'price', 'prices', 'fare', 'fares', 'cost', 'costs', 'priced', 'expensive'}
+SORT_WORDS = {'ordered', 'order', 'sorted', 'sort', 'ranked', 'rank', 'highest', 'high', 'ascending', 'descending'}
+DIRECT_WORDS = {'direct', 'nonstop', 'non', 'stop'}
+CONNECTING_WORDS = {'connecting', 'connection', 'connections', 'layover', 'layovers', 'stopover'}
+MEAL_WORDS = {'free', 'meal', 'meals', 'included', 'includes', 'including', 'complimentary'}
+# Words a rain threshold must sit next to: "rain below 30", "at most 30 percent"
+RAIN_SUBJECT_WORDS = {'rain', 'rainy', 'raining', 'weather', 'chance', 'probability'}
+RAIN_WORDS = {'rain', 'rainy', 'raining', 'chance', 'probability', 'weather', 'percent', 'low', 'little'}
+COMPARISON_WORDS = {'below', 'under', 'less', 'than', 'at', 'least', 'most', 'max', 'maximum', 'upto', 'up', '<', '='}
+LIMIT_WORDS = {'top', 'first'}
+
+KNOWN_WORDS = (FILLER_WORDS | CHEAPEST_WORDS | PRICE_WORDS | SORT_WORDS | DIRECT_WORDS | CONNECTING_WORDS
+               | MEAL_WORDS | RAIN_WORDS | COMPARISON_WORDS | LIMIT_WORDS)
+
+class CompiledQuery(NamedTuple):
+    sql: str
+    params: Dict[str, object]
+
+    def render(self) -> str:
+        """The statement with its parameters bound as SQLite literals, for
+        streaming to the client and executing like generated SQL."""
+        statement = text(self.sql).bindparams(**self.params)
+        return str(statement.compile(dialect=engine.dialect, compile_kwargs={"literal_binds": True}))
+
+def _route(tokens: List[str]) -> Optional[Dict[str, str]]:
+    """Origin and destination from "from <city> ... to <city>", when each appears once."""
+    origins = [tokens[i + 1] for i, token in enumerate(tokens[:-1]) if token == 'from' and tokens[i + 1] in CITY_TOKENS]
+    destinations = [tokens[i + 1] for i, token in enumerate(tokens[:-1]) if token == 'to' and tokens[i + 1] in CITY_TOKENS]
+    cities = [token for token in tokens if token in CITY_TOKENS]
+    if len(origins) != 1 or len(destinations) != 1 or len(cities) != 2:
+        return None
+    if tokens.index(origins[0]) > tokens.index(destinations[0]) or origins[0] == destinations[0]:
+        return None
+    origin, destination = _CITY_NAMES.get(origins[0]), _CITY_NAMES.get(destinations[0])
+    if origin is None or destination is None:
+        return None
+    return {'origin': origin, 'destination': destination}
+
+def _comparison(tokens: List[str], i: int) -> Tuple[Optional[str], int]:
+    """SQL operator of the comparison phrase right before the number at i,
+    and where that phrase starts; (None, i) when there is none."""
+    previous = tokens[i - 1] if i else ''
+    pair = tokens[max(0, i - 2):i]
+    if pair == ['<', '=']:
+        return '<=', i - 2
+    if pair in (['at', 'most'], ['up', 'to']):
+        return '<=', i - 2
+    if pair == ['less', 'than']:
+        return '<', i - 2
+    if pair == ['at', 'least']:
+        return '>=', i - 2
+    if previous in ('upto', 'max', 'maximum'):
+        return '<=', i - 1
+    if previous in ('below', 'under', '<'):
+        return '<', i - 1
+    return None, i
+
+def compile_question(question: str) -> Optional[CompiledQuery]:
+    """
+    Compile a common flight search into parameterized SQL without the LLM.
+
+    Recognizes a single one-way route plus direct/connecting, free meal, a
+    rain threshold, price sorting and a result limit. Every word must be
+    filler or fill one of these slots in a phrase that gives it a meaning
+    ("least expensive", "at most 30", "non stop"); a question with any
+    other word or number returns None and goes to the LLM.
+    """
+    # normalize_question drops '%', which marks a rain threshold ("under 30%")
+    tokens = normalize_question(question.replace('%', ' percent ')).split()
+    words = {token for token in tokens if token not in CITY_TOKENS and not token.isdigit()}
+    if not tokens or words - KNOWN_WORDS:
+        return None
+
+    params = _route(tokens)
+    if params is None:
+        return None
+
+    used = {i for i, token in enumerate(tokens) if token in CITY_TOKENS}
+
+    def at(i: int) -> str:
+        return tokens[i] if 0 <= i < len(tokens) else ''
+
+    conditions = ["origin = :origin", "destination = :destination"]
+
+    # Direct ("direct", "nonstop", "non stop") or connecting; a lone "stop" fills neither
+    direct = connecting = False
+    for i, token in enumerate(tokens):
+        if token in ('direct', 'nonstop'):
+            direct = True
+            used.add(i)
+        elif token == 'non' and at(i + 1) == 'stop':
+            direct = True
+            used.update((i, i + 1))
+        elif token in CONNECTING_WORDS:
+            connecting = True
+            used.add(i)
+    if direct and connecting:
+        return None
+    if direct:
+        conditions.append(f"flightType IN {DIRECT_FLIGHT_TYPES}")
+    elif connecting:
+        conditions.append(f"flightType NOT IN {DIRECT_FLIGHT_TYPES}")
+
+    if words & {'meal', 'meals'}:
+        conditions.append("freeMeal = 1")
+        used.update(i for i, token in enumerate(tokens) if token in MEAL_WORDS)
+
+    # Rain: a number needs an explicit comparison before it and a rain word or
+    # "percent" right next to the phrase; "low rain" uses the default threshold.
+    # Any other number (e.g. a price ceiling, "under 20000") gives up
+    rain_words = [i for i, token in enumerate(tokens) if token in {'rain', 'rainy', 'raining', 'weather'}]
+    rain_op = None
+    limit = None
+    for i, token in enumerate(tokens):
+        if not token.isdigit():
+            continue
+        op, phrase_start = _comparison(tokens, i)
+        next_to_rain = at(phrase_start - 1) in RAIN_SUBJECT_WORDS or at(i + 1) in RAIN_SUBJECT_WORDS | {'percent'}
+        if rain_words and op and next_to_rain and rain_op is None:
+            params['rain'] = int(token)
+            rain_op = op
+            used.update(range(phrase_start, i + 1))
+        elif at(i - 1) in LIMIT_WORDS and limit is None:
+            limit = int(token)
+            used.update((i - 1, i))
+        elif at(i + 1) in {'cheapest', 'flights'} and limit is None:
+            limit = int(token)
+            used.add(i)
+        else:
+            return None
+    if rain_words:
+        if rain_op is None:
+            low = [i for i, token in enumerate(tokens)
+                   if token in ('low', 'little') and at(i + 1) in {'rain', 'chance', 'probability'}]
+            if not low:
+                return None
+            params['rain'] = LOW_RAIN_THRESHOLD
+            rain_op = '<'
+            used.update(low)
+        conditions.append(f"rainProbability {rain_op} :rain")
+        used.update(rain_words)
+        used.update(i for i, token in enumerate(tokens) if token in {'chance', 'probability', 'percent'})
+
+    # Price order: 'low'/'high'/'least'/'most'/'best' only count next to the word they modify
+    ascending = descending = sort = False
+    for i, token in enumerate(tokens):
+        if i in used:
+            continue
+        if token in ('cheapest', 'cheap', 'affordable', 'economical', 'budget'):
+            ascending = True
+            used.add(i)
+            if at(i - 1) == 'most' and token in ('affordable', 'economical'):
+                used.add(i - 1)
+        elif token in ('low', 'lowest', 'best') and at(i + 1) in PRICE_WORDS - {'expensive'}:
+            ascending = True
+            used.update((i, i + 1))
+        elif token in ('high', 'highest') and at(i + 1) in PRICE_WORDS - {'expensive'}:
+            descending = True
+            used.update((i, i + 1))
+        elif token == 'expensive':
+            if at(i - 1) == 'least':
+                ascending = True
+                used.update((i - 1, i))
+            else:
+                descending = True
+                used.update((i - 1, i) if at(i - 1) == 'most' else (i,))
+        elif token in ('low', 'lowest') and at(i + 1) == 'to' and at(i + 2) in ('high', 'highest'):
+            ascending = sort = True
+            used.update((i, i + 1, i + 2))
+        elif token in ('high', 'highest') and at(i + 1) == 'to' and at(i + 2) in ('low', 'lowest'):
+            descending = sort = True
+            used.update((i, i + 1, i + 2))
+        elif token in ('ascending', 'descending'):
+            ascending, descending = ascending or token == 'ascending', descending or token == 'descending'
+            sort = True
+            used.add(i)
+        elif token in ('ordered', 'order', 'sorted', 'sort', 'ranked', 'rank'):
+            sort = True
+            used.add(i)
+    if ascending and descending:
+        return None
+    # Bare price words ("fares from X to Y", "sorted by price") only name what is shown or sorted
+    used.update(i for i, token in enumerate(tokens) if token in PRICE_WORDS)
+
+    if any(i not in used and token not in FILLER_WORDS for i, token in enumerate(tokens)):
+        return None
+
+    order = ""
+    if descending:
+        order = " ORDER BY price_inr DESC"
+    elif ascending or sort:
+        order = " ORDER BY price_inr ASC"
+    if limit is None:
+        # "cheapest flight" asks for one row, "cheapest flights" or a sort for a list
+        singular = ('flight' in words or 'fare' in words or 'price' in words) and 'flights' not in words
+        limit = 1 if order and singular and not sort else SQL_TOP_K
+    params['limit'] = limit
+
+    sql = f"SELECT {COLUMNS} FROM flights WHERE {' AND '.join(conditions)}{order} LIMIT :limit"
+    return CompiledQuery(sql, params)
@@ -0,0 +1,102 @@
+import re
+from typing import List, NamedTuple, Tuple
+from sqlalchemy.exc import SQLAlchemyError
+from async_db import run_query
+from cities import CITIES
+from sql_prompt import ALLOWED_ROUTES
+from config import SQL_TOP_K, SQL_VERIFY_POLICY
+
+INVALID = "invalid"
+SIMPLE = "simple"
+COMPLEX = "complex"
+
+# EXPLAIN only compiles the statement, so it should never come close to this
+EXPLAIN_TIMEOUT_SECONDS = 2
+
+ROUTE_PAIRS = {frozenset(route) for route in ALLOWED_ROUTES}
+
+_CITY_EQUALS = re.compile(r"\b(origin|destination)\s*(?:==?|LIKE)\s*'([^']*)'", re.IGNORECASE)
+_CITY_IN = re.compile(r"\b(origin|destination)\s+IN\s*\(([^)]*)\)", re.IGNORECASE)
+_OUTER_LIMIT = re.compile(r"\bLIMIT\s+\d+(\s*(,|OFFSET)\s*\d+)?\s*$", re.IGNORECASE)
+_NOT_SIMPLE = re.compile(r"\b(JOIN|UNION|INTERSECT|EXCEPT|GROUP\s+BY|HAVING|WITH)\b", re.IGNORECASE)
+
+class LocalVerdict(NamedTuple):
+    status: str
+    reason: str
+    sql: str
+
+def _strip_literals(sql: str) -> str:
+    """The query with string literals blanked, so keywords inside them are ignored."""
+    return re.sub(r"'(?:[^']|'')*'", "''", sql)
+
+def referenced_cities(sql: str) -> List[Tuple[str, str]]:
+    """(column, city) pairs for every origin/destination equality or IN filter."""
+    cities = [(column.lower(), value) for column, value in _CITY_EQUALS.findall(sql)]
+    for column, values in _CITY_IN.findall(sql):
+        cities += [(column.lower(), value) for value in re.findall(r"'([^']*)'", values)]
+    return cities
+
+def check_sql(sql: str) -> LocalVerdict:
+    """
+    Rule checks that need no database: a single read-only SELECT, a LIMIT on
+    the outer query (appended when missing) and city filters that name
+    cities and routes from the prompt. Returns the possibly amended SQL.
+    """
+    sql = sql.strip().rstrip(';').strip()
+    bare = _strip_literals(sql)
+
+    if not sql:
+        return LocalVerdict(INVALID, "Empty query", sql)
+    if ';' in bare:
+        return LocalVerdict(INVALID, "More than one statement", sql)
+    if not re.match(r"(SELECT|WITH)\b", bare, re.IGNORECASE):
+        return LocalVerdict(INVALID, "Not a SELECT statement", sql)
+
+    if not _OUTER_LIMIT.search(bare):
+        sql = f"{sql}\nLIMIT {SQL_TOP_K}"
+
+    cities = referenced_cities(sql)
+    for column, city in cities:
+        if '%' not in city and city not in CITIES:
+            return LocalVerdict(INVALID, f"Unknown {column} city '{city}'", sql)
+
+    simple = (
+        len(re.findall(r"\bSELECT\b", bare, re.IGNORECASE)) == 1
+        and not _NOT_SIMPLE.search(bare)
+        and re.search(r"\bFROM\s+flights\b", bare, re.IGNORECASE)
+    )
+    origins = {city for column, city in cities if column == 'origin'}
+    destinations = {city for column, city in cities if column == 'destination'}
+    if origins and destinations and not all(
+            frozenset((origin, destination)) in ROUTE_PAIRS for origin in origins for destination in destinations):
+        # Possibly what the user asked for, but not a route we serve: let the LLM judge
+        return LocalVerdict(COMPLEX, "Route outside the allowed routes", sql)
+
+    return LocalVerdict(SIMPLE if simple else COMPLEX, "", sql)
+
+async def validate_sql_locally(sql: str) -> LocalVerdict:
+    """
+    Run the rule checks, then compile the query against the live schema with
+    EXPLAIN (on the read-only pool) to catch syntax errors and unknown
+    tables or columns without executing it.
+    """
+    verdict = check_sql(sql)
+    if verdict.status == INVALID:
+        return verdict
+
+    try:
+        await run_query(f"EXPLAIN {verdict.sql}", timeout=EXPLAIN_TIMEOUT_SECONDS)
+    except TimeoutError:
+        return verdict._replace(status=COMPLEX)
+    except SQLAlchemyError as e:
+        reason = str(getattr(e, 'orig', e)).splitlines()[0]
+        return verdict._replace(status=INVALID, reason=f"Does not compile: {reason}")
+    return verdict
+
+def needs_llm_verification(verdict: LocalVerdict) -> bool:
+    """Whether the LLM verifier still has to look at a locally valid query."""
+    if SQL_VERIFY_POLICY == 'local':
+        return False
+    if SQL_VERIFY_POLICY == 'local_simple':
+        return verdict.status != SIMPLE
+    return True
@@ -0,0 +1,90 @@
+import asyncio
+import json
+from typing import AsyncGenerator, Callable, Dict, List
+from normalize_question import normalize_question
+from config import logger
+
+class SharedRun:
+    """One pipeline run and every event it has produced so far."""
+
+    def __init__(self, key: str):
+        self.key = key
+        self.events: List[str] = []
+        self.done = False
+        self.subscribers = 0
+        self.changed = asyncio.Condition()
+        self.task: "asyncio.Task[None]" = None
+
+class StreamCoalescer:
+    """
+    Single-flight wrapper around an event stream factory (stream_response).
+    Concurrent requests whose questions normalize to the same key share one
+    run; every subscriber, including one that joins mid-run, receives all of
+    its events from the start. The run is cancelled when its last subscriber
+    disconnects, and forgotten once it completes.
+    """
+
+    def __init__(self, factory: Callable[[str], AsyncGenerator[str, None]]):
+        self.factory = factory
+        self._runs: Dict[str, SharedRun] = {}
+        self.started = 0
+        self.joined = 0
+
+    async def _produce(self, run: SharedRun, question: str) -> None:
+        try:
+            async for event in self.factory(question):
+                async with run.changed:
+                    run.events.append(event)
+                    run.changed.notify_all()
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.error("Error in shared stream: %s", str(e))
+            run.events.append(json.dumps({"type": "error", "content": str(e)}))
+        finally:
+            run.done = True
+            if self._runs.get(run.key) is run:
+                del self._runs[run.key]
+            async with run.changed:
+                run.changed.notify_all()
+
+    async def subscribe(self, question: str) -> AsyncGenerator[str, None]:
+        key = normalize_question(question)
+        run = self._runs.get(key)
+        if run is None:
+            run = SharedRun(key)
+            run.task = asyncio.create_task(self._produce(run, question))
+            self._runs[key] = run
+            self.started += 1
+        else:
+            self.joined += 1
+        run.subscribers += 1
+
+        position = 0
+        try:
+            while True:
+                while position < len(run.events):
+                    yield run.events[position]
+                    position += 1
+                if run.done:
+                    return
+                async with run.changed:
+                    await run.changed.wait_for(lambda: run.done or position < len(run.events))
+        finally:
+            run.subscribers -= 1
+            if run.subscribers == 0 and not run.done:
+                # Nobody is listening any more
+                run.task.cancel()
+                if self._runs.get(key) is run:
+                    del self._runs[key]
+
+    def in_flight(self, question: str) -> bool:
+        """Whether a request for this question would join a run already in progress."""
+        return normalize_question(question) in self._runs
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "runs_started": self.started,
+            "requests_coalesced": self.joined,
+            "in_flight": len(self._runs),
+        }
@@ -0,0 +1,20 @@
+from langchain_core.prompts import PromptTemplate
+
+# Used when the flight cards are rendered locally: the LLM only writes the summary
+summary_prompt = PromptTemplate(
+    input_variables=["question", "query_result"],
+    template="""
+The user has already been shown every flight below as a formatted card. Write only the summary.
+
+User Query: {question}
+Flights: {query_result}
+
+Instructions:
+- Start with "**Summary:**" and write at most three sentences.
+- Highlight the single cheapest option: airline, date and price formatted with a '₹' symbol and comma separators (e.g., ₹32,621).
+- Mention meals, weather or flight type only where they matter for the user's query or differ between the options.
+- Do not list or repeat the individual flights, and do not add links.
+- Flights are a table with one line per flight; values under "Same for every row" apply to all of them.
+- Use only the data above. Do not invent flights or details.
+"""
+)
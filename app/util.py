@@ -1,4 +1,7 @@
 import ast
+from typing import List, Tuple
+from sqlalchemy import text
+from sqlalchemy.engine import Engine
 
 def parse_tuple_list(string_representation: str):
     """Parse string representation of a list of tuples into a Python list."""
@@ -9,4 +12,11 @@ def parse_tuple_list(string_representation: str):
         else:
             raise ValueError("Invalid format: Expected a list of tuples.")
     except (SyntaxError, ValueError) as e:
-        raise ValueError(f"Error parsing string: {e}") from e
\ No newline at end of file
+        raise ValueError(f"Error parsing string: {e}") from e
+
+def fetch_rows(engine: Engine, query: str) -> Tuple[List[str], List[tuple]]:
+    """Execute a query and return its column names and rows as plain tuples,
+    without rendering them to a string first."""
+    with engine.connect() as conn:
+        result = conn.execute(text(query))
+        return list(result.keys()), [tuple(row) for row in result]
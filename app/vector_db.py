@@ -1,20 +1,68 @@
+import asyncio
 import json
 import os
 from pathlib import Path
-from typing import List, Dict
-import openai
-import tiktoken
-from config import luggage_llm
+from typing import List, Dict, Optional, Tuple
+import numpy as np
+from config import (
+    luggage_llm, logger, EMBEDDING_BACKEND, EMBEDDING_BATCH_SIZE, POLICY_RETRIEVAL, POLICY_TOP_K,
+    POLICY_DOCUMENTS_PATH
+)
 from strip_think_tags import strip_think_tags
 from luggage_prompt import luggage_prompt
-
-client = openai.AsyncOpenAI()
-
-# Usage example:
-documents = [
+from normalize_question import normalize_question
+from policy_cache import PolicyKey, policy_answer_cache, read_policy_file
+from split_document import split_documents
+from embedding_store import content_hash, load_embeddings, save_embeddings
+from bm25_index import BM25Index, reciprocal_rank_fusion
+from vector_index import (
+    EmbeddingBackend, HashingEmbeddingBackend, OpenAIEmbeddingBackend, VectorIndex, normalize_rows
+)
+
+# Both created on first use (the openai package is slow to import); assign
+# embedding_backend to override the EMBEDDING_BACKEND setting
+client = None
+embedding_backend: Optional[EmbeddingBackend] = None
+
+# Built at startup by build_policy_index, or in the background on the first
+# lookup when startup warm-up is off; search_policy uses BM25 alone while it is None
+policy_index: Optional[VectorIndex] = None
+_policy_index_task: Optional["asyncio.Task[VectorIndex]"] = None
+
+# airline -> (policy file hash, BM25 index over its sections)
+keyword_indexes: Dict[str, Tuple[str, BM25Index]] = {}
+
+DEFAULT_DOCUMENTS = [
     {"name": "IndiGo", "policy_file": "../data/indigo_policy.txt"},
     {"name": "VietJet Air", "policy_file": "../data/vietjet_policy.txt"}
 ]
+DEFAULT_EMBEDDING_CACHE_DIR = "./embeddings_cache"
+
+def load_registered_documents(path: Optional[str] = POLICY_DOCUMENTS_PATH) -> Tuple[List[Dict], str]:
+    """Policy documents and embedding cache dir saved by register_documents, else the defaults."""
+    if path:
+        try:
+            with open(path, 'r', encoding='utf-8') as file:
+                registered = json.load(file)
+            return registered["documents"], registered["cache_dir"]
+        except FileNotFoundError:
+            pass
+        except (ValueError, KeyError) as e:
+            logger.warning("Ignoring unreadable policy documents file %s: %s", path, str(e))
+    return DEFAULT_DOCUMENTS, DEFAULT_EMBEDDING_CACHE_DIR
+
+def register_documents(documents: List[Dict], cache_dir: str, path: str = POLICY_DOCUMENTS_PATH) -> None:
+    """Make the server use these documents and their embedding cache from its next start."""
+    registered = {
+        "documents": [{"name": doc["name"], "policy_file": doc["policy_file"]} for doc in documents],
+        "cache_dir": os.path.abspath(cache_dir),
+    }
+    temp_path = f"{path}.tmp"
+    with open(temp_path, 'w', encoding='utf-8') as file:
+        json.dump(registered, file, indent=2)
+    os.replace(temp_path, path)
+
+documents, embedding_cache_dir = load_registered_documents()
 
 def read_file(file_path: str) -> str:
     # Get the directory containing the script
@@ -31,145 +79,182 @@ def read_file(file_path: str) -> str:
         print(f"Trying to read file at: {absolute_path}")
         raise
 
-def split_document(text: str, max_tokens: int = 500) -> List[str]:
-    # Initialize tokenizer for ada-002
-    enc = tiktoken.encoding_for_model("text-embedding-ada-002")
-
-    chunks = []
-    current_chunk = []
-    current_size = 0
-
-    # Split into sentences (basic implementation)
-    sentences = text.replace('\n', ' ').split('. ')
-
-    for sentence in sentences:
-        sentence = sentence.strip() + '. '
-        sentence_tokens = len(enc.encode(sentence))
-
-        if current_size + sentence_tokens > max_tokens:
-            # Join the current chunk and add to chunks
-            chunks.append(''.join(current_chunk))
-            current_chunk = [sentence]
-            current_size = sentence_tokens
-        else:
-            current_chunk.append(sentence)
-            current_size += sentence_tokens
-
-    # Add the last chunk if it exists
-    if current_chunk:
-        chunks.append(''.join(current_chunk))
-
-    return chunks
+def get_openai_client():
+    global client
+    if client is None:
+        import openai
+        client = openai.AsyncOpenAI()
+    return client
+
+def get_embedding_backend() -> EmbeddingBackend:
+    global embedding_backend
+    if embedding_backend is None:
+        embedding_backend = (
+            HashingEmbeddingBackend() if EMBEDDING_BACKEND == "hashing" else OpenAIEmbeddingBackend(get_openai_client())
+        )
+    return embedding_backend
 
 async def get_embedding(text: str) -> List[float]:
-    response = await client.embeddings.create(
-        model="text-embedding-3-small",
-        input=text
-    )
-    return response.data[0].embedding
-
-async def process_documents(documents: List[Dict], embedding_cache_dir: str = "./embeddings_cache"):
-    # Create cache directory if it doesn't exist
-    Path(embedding_cache_dir).mkdir(parents=True, exist_ok=True)
-
-    document_chunks = []
-    chunk_embeddings = []
-    chunk_metadata = []
-
+    embeddings = await get_embedding_backend().embed([text])
+    return embeddings[0]
+
+async def embed_in_batches(texts: List[str], batch_size: int = EMBEDDING_BATCH_SIZE) -> np.ndarray:
+    """Embed texts with one backend request per batch instead of one per text."""
+    vectors = []
+    for start in range(0, len(texts), batch_size):
+        vectors.extend(await get_embedding_backend().embed(texts[start:start + batch_size]))
+    return np.asarray(vectors, dtype=np.float32)
+
+async def process_documents(documents: List[Dict], embedding_cache_dir: str = DEFAULT_EMBEDDING_CACHE_DIR,
+                            workers: int = 1) -> List[Tuple[str, List[str], np.ndarray]]:
+    """(airline, chunks, embeddings) per document; cached embeddings stay memory-mapped."""
+    # Embeddings from different backends are not comparable, so cache them separately
+    cache_dir = os.path.join(embedding_cache_dir, get_embedding_backend().name)
+
+    # First pass: reuse caches whose source file is unchanged
+    plans = []
+    stale = []
     for doc in documents:
-        # Create a unique cache filename for this document
-        cache_filename = f"{doc['name'].lower().replace(' ', '_')}_embeddings.json"
-        cache_path = os.path.join(embedding_cache_dir, cache_filename)
+        text = read_file(doc['policy_file'])
+        source_hash = content_hash(text)
+        sidecar, matrix = load_embeddings(cache_dir, doc['name'])
 
-        # Check if we have cached embeddings
-        if os.path.exists(cache_path):
+        if sidecar is not None and sidecar['source_hash'] == source_hash:
             print(f"Loading cached embeddings for {doc['name']}")
-            with open(cache_path, 'r') as f:
-                cached_data = json.load(f)
-                document_chunks.extend(cached_data['chunks'])
-                chunk_embeddings.extend(cached_data['embeddings'])
-                chunk_metadata.extend(cached_data['metadata'])
+            plans.append((doc, sidecar, matrix, None))
         else:
-            print(f"Creating new embeddings for {doc['name']}")
-            # Read and process the document
-            text = read_file(doc['policy_file'])
-            doc_chunks = split_document(text)
-
-            # Store new chunks and their metadata
-            doc_embeddings = []
-            doc_metadata = []
-
-            for i, chunk in enumerate(doc_chunks):
-                embedding = await get_embedding(chunk)
-                doc_embeddings.append(embedding)
-                doc_metadata.append({
-                    "airline": doc["name"],
-                    "chunk_index": i,
-                    "total_chunks": len(doc_chunks)
-                })
-
-            # Save to cache
-            cache_data = {
-                'chunks': doc_chunks,
-                'embeddings': doc_embeddings,
-                'metadata': doc_metadata
-            }
-            with open(cache_path, 'w') as f:
-                json.dump(cache_data, f)
-
-            # Add to our current results
-            document_chunks.extend(doc_chunks)
-            chunk_embeddings.extend(doc_embeddings)
-            chunk_metadata.extend(doc_metadata)
-
-    return {
-        'chunks': document_chunks,
-        'embeddings': chunk_embeddings,
-        'metadata': chunk_metadata
-    }
-
-async def generate_llm_response(airline: str, query: str, relevant_text: str) -> str:
+            stale.append((doc, text, source_hash, sidecar, matrix))
+
+    # Chunk changed documents (in parallel when workers > 1) and work out
+    # which chunks have never been embedded
+    missing = {}
+    chunked = split_documents([text for _, text, _, _, _ in stale], workers=workers)
+    for (doc, _, source_hash, sidecar, matrix), chunks in zip(stale, chunked):
+        hashes = [content_hash(chunk) for chunk in chunks]
+        known = {chunk_hash: row for row, chunk_hash in enumerate(sidecar['chunk_hashes'])} if sidecar else {}
+        new_chunks = {chunk_hash: chunk for chunk_hash, chunk in zip(hashes, chunks) if chunk_hash not in known}
+        missing.update(new_chunks)
+        print(f"Creating embeddings for {len(new_chunks)} of {len(chunks)} chunks of {doc['name']}")
+        plans.append((doc, {'source_hash': source_hash, 'chunks': chunks, 'chunk_hashes': hashes},
+                      matrix, known))
+
+    # Embed every new chunk across all documents in batched requests
+    missing_hashes = list(missing)
+    new_vectors = await embed_in_batches([missing[chunk_hash] for chunk_hash in missing_hashes])
+    new_rows = dict(zip(missing_hashes, new_vectors))
+
+    processed = []
+    for doc, sidecar, matrix, known in plans:
+        if known is not None:
+            # Saved normalized, so the index can search the memory-mapped file as is
+            rows = [matrix[known[chunk_hash]] if chunk_hash in known else new_rows[chunk_hash]
+                    for chunk_hash in sidecar['chunk_hashes']]
+            matrix = normalize_rows(np.asarray(rows, dtype=np.float32)) if rows else np.empty((0, 0), np.float32)
+            save_embeddings(cache_dir, doc['name'], sidecar, matrix)
+        processed.append((doc['name'], sidecar['chunks'], matrix))
+    return processed
+
+async def build_policy_index() -> VectorIndex:
+    """Embed the policy documents and load them into the in-memory vector index."""
+    global policy_index
+    policy_index = VectorIndex(await process_documents(documents, embedding_cache_dir))
+    logger.info("Policy vector index built with %d chunks", len(policy_index))
+    return policy_index
+
+def _policy_index_built(task: "asyncio.Task[VectorIndex]") -> None:
+    if not task.cancelled() and task.exception() is not None:
+        logger.warning("Could not build policy vector index: %s", str(task.exception()))
+
+def start_policy_index_build() -> None:
+    """Build the policy vector index in the background, once per process."""
+    global _policy_index_task
+    if policy_index is None and _policy_index_task is None:
+        _policy_index_task = asyncio.create_task(build_policy_index())
+        _policy_index_task.add_done_callback(_policy_index_built)
+
+def policy_path(policy_file: str) -> str:
+    return os.path.join(Path(__file__).parent.absolute(), policy_file)
+
+def get_keyword_index(airline: str, policy_text: str, policy_digest: str) -> BM25Index:
+    """BM25 index over an airline's "\n\n"-separated policy sections, rebuilt
+    only when the policy file changes."""
+    cached = keyword_indexes.get(airline)
+    if cached is None or cached[0] != policy_digest:
+        sections = [section for section in policy_text.split("\n\n") if section.strip()]
+        cached = (policy_digest, BM25Index(sections))
+        keyword_indexes[airline] = cached
+    return cached[1]
+
+def build_keyword_indexes() -> None:
+    """Build the BM25 index of every policy document up front."""
+    for doc in documents:
+        try:
+            policy_text, policy_digest = read_policy_file(policy_path(doc["policy_file"]))
+        except FileNotFoundError:
+            logger.warning("Policy document for %s not found", doc["name"])
+            continue
+        get_keyword_index(doc["name"], policy_text, policy_digest)
+
+async def find_relevant_text(airline: str, query: str, policy_text: str, policy_digest: str) -> Optional[str]:
+    """Top policy passages for the query, ranked by BM25, by vector similarity,
+    or by both merged with reciprocal rank fusion (POLICY_RETRIEVAL)."""
+    rankings = []
+
+    if POLICY_RETRIEVAL in ("bm25", "hybrid"):
+        keyword_index = get_keyword_index(airline, policy_text, policy_digest)
+        rankings.append([section for section, _ in keyword_index.search(query, k=POLICY_TOP_K)])
+
+    vector_enabled = POLICY_RETRIEVAL in ("vector", "hybrid") or not rankings
+    if vector_enabled:
+        start_policy_index_build()
+    if vector_enabled and policy_index is not None and policy_index.has_airline(airline):
+        query_embedding = await get_embedding(query)
+        matches = policy_index.search(query_embedding, k=POLICY_TOP_K, airline=airline)
+        rankings.append([chunk for chunk, _, _ in matches])
+
+    passages = reciprocal_rank_fusion(rankings)[:POLICY_TOP_K]
+    return "\n\n".join(passages) if passages else None
+
+async def generate_llm_response(airline: str, query: str, relevant_text: str,
+                                cache_key: Optional[PolicyKey] = None) -> str:
     prompt = luggage_prompt.format(airline=airline, query=query, relevant_text=relevant_text)
 
     try:
         response = await luggage_llm.ainvoke(prompt)
-        return strip_think_tags(response).strip()
+        answer = strip_think_tags(response).strip()
+        # Only real LLM answers are cached, never the fallback below
+        if cache_key is not None:
+            policy_answer_cache.put(cache_key, answer)
+        return answer
     except Exception:
         # Fallback to a basic response if LLM fails
         return f"According to {airline}'s policy: {relevant_text}"
 
-def search_policy(airline: str, query: str) -> str:
+async def search_policy(airline: str, query: str) -> str:
     policy_file = next((doc["policy_file"] for doc in documents
                        if doc["name"].lower() == airline.lower()), None)
 
-    script_dir = Path(__file__).parent.absolute()
-    absolute_path = os.path.join(script_dir, policy_file)
-
     if not policy_file:
         return f"I apologize, but I don't have any policy information available for {airline}."
 
     try:
-        with open(absolute_path, 'r', encoding='utf-8') as file:
-            policy_text = file.read()
+        policy_text, policy_digest = read_policy_file(policy_path(policy_file))
     except FileNotFoundError:
         return f"I apologize, but I couldn't find the policy document for {airline}."
 
-    query_keywords = query.lower().split()
-
-    # Searching for the most relevant section
-    sections = policy_text.split("\n\n")
-    relevant_sections = []
+    cache_key = (airline, normalize_question(query), policy_digest)
+    cached_answer = policy_answer_cache.get(cache_key)
+    if cached_answer is not None:
+        return cached_answer
 
-    for section in sections:
-        if any(keyword in section.lower() for keyword in query_keywords):
-            relevant_sections.append(section)
+    relevant_text = await find_relevant_text(airline, query, policy_text, policy_digest)
 
-    if relevant_sections:
-        relevant_text = "\n\n".join(relevant_sections[:3])
-        return generate_llm_response(airline, query, relevant_text)
+    if relevant_text:
+        return await generate_llm_response(airline, query, relevant_text, cache_key)
     else:
-        return generate_llm_response(
+        return await generate_llm_response(
             airline,
             query,
-            "No specific information found in the policy document."
+            "No specific information found in the policy document.",
+            cache_key
         )
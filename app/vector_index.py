@@ -0,0 +1,111 @@
+import hashlib
+import re
+from abc import ABC, abstractmethod
+from typing import Dict, List, Optional, Sequence, Tuple
+import numpy as np
+
+class EmbeddingBackend(ABC):
+    """Turns texts into embedding vectors. Subclasses implement `embed`."""
+
+    name = "base"
+
+    @abstractmethod
+    async def embed(self, texts: Sequence[str]) -> List[List[float]]:
+        """One embedding vector per text, in order."""
+
+class OpenAIEmbeddingBackend(EmbeddingBackend):
+    """Embeddings from the OpenAI API, one request per batch of texts."""
+
+    name = "openai"
+
+    def __init__(self, client, model: str = "text-embedding-3-small"):
+        self.client = client
+        self.model = model
+
+    async def embed(self, texts: Sequence[str]) -> List[List[float]]:
+        response = await self.client.embeddings.create(model=self.model, input=list(texts))
+        return [item.embedding for item in sorted(response.data, key=lambda item: item.index)]
+
+class HashingEmbeddingBackend(EmbeddingBackend):
+    """
+    Deterministic local embedder: each word is hashed into one of `dimensions`
+    signed buckets. No network access, so it suits tests and offline runs.
+    """
+
+    name = "hashing"
+
+    def __init__(self, dimensions: int = 256):
+        self.dimensions = dimensions
+
+    def embed_one(self, text: str) -> List[float]:
+        vector = [0.0] * self.dimensions
+        for word in re.findall(r'\w+', text.lower()):
+            digest = hashlib.md5(word.encode('utf-8')).digest()
+            bucket = int.from_bytes(digest[:4], 'little') % self.dimensions
+            vector[bucket] += 1.0 if digest[4] & 1 else -1.0
+        return vector
+
+    async def embed(self, texts: Sequence[str]) -> List[List[float]]:
+        return [self.embed_one(text) for text in texts]
+
+def normalize_rows(matrix: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return matrix / norms
+
+class VectorIndex:
+    """
+    In-memory cosine-similarity index over policy chunks.
+
+    Each airline's chunks keep their own float32 embedding matrix. Matrices
+    whose rows are already L2-normalized, such as those memory-mapped by
+    embedding_store, are searched in place; any other is normalized once.
+    A query is a single matrix-vector product over one airline's matrix.
+    """
+
+    def __init__(self, documents: Sequence[Tuple[str, List[str], np.ndarray]]):
+        """`documents` holds (airline, chunks, embeddings) per policy document."""
+        self._airlines: Dict[str, Tuple[List[str], np.ndarray]] = {}
+        for airline, chunks, embeddings in documents:
+            if airline in self._airlines:
+                raise ValueError(f"More than one policy document for {airline}")
+            matrix = np.asarray(embeddings, dtype=np.float32)
+            if matrix.ndim != 2:
+                matrix = matrix.reshape(len(chunks), -1) if len(chunks) else np.empty((0, 0), dtype=np.float32)
+            if matrix.shape[0] != len(chunks):
+                raise ValueError(f"{airline}: chunks and embeddings must have the same length")
+            norms = np.linalg.norm(matrix, axis=1)
+            if not np.all((np.abs(norms - 1) < 1e-4) | (norms == 0)):
+                matrix = normalize_rows(matrix)
+            self._airlines[airline] = (chunks, matrix)
+
+    def __len__(self) -> int:
+        return sum(len(chunks) for chunks, _ in self._airlines.values())
+
+    def has_airline(self, airline: str) -> bool:
+        return airline in self._airlines
+
+    def search(self, query_embedding: Sequence[float], k: int = 3,
+               airline: Optional[str] = None) -> List[Tuple[str, float, Dict]]:
+        """Return the top-k (chunk, cosine score, metadata) for the query, best first."""
+        airlines = list(self._airlines) if airline is None else [airline] if airline in self._airlines else []
+        if not airlines or k <= 0:
+            return []
+
+        query = np.asarray(query_embedding, dtype=np.float32)
+        norm = np.linalg.norm(query)
+        if norm == 0:
+            return []
+
+        matches = [match for name in airlines for match in self._top(name, query / norm, k)]
+        return sorted(matches, key=lambda match: -match[1])[:k]
+
+    def _top(self, airline: str, query: np.ndarray, k: int) -> List[Tuple[str, float, Dict]]:
+        chunks, matrix = self._airlines[airline]
+        if not chunks:
+            return []
+        scores = matrix @ query
+        k = min(k, len(chunks))
+        top = np.argpartition(-scores, k - 1)[:k]
+        return [(chunks[i], float(scores[i]),
+                 {"airline": airline, "chunk_index": int(i), "total_chunks": len(chunks)}) for i in top]
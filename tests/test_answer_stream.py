@@ -0,0 +1,70 @@
+import pytest
+from answer_stream import AnswerStream, FlushBuffer, ThinkFilter
+from result_encoding import LinkExpander
+
+def run_filter(stream, chunks):
+    return "".join(stream.feed(chunk) for chunk in chunks) + stream.finish()
+
+def run_answer(stream, chunks):
+    events = [stream.feed(chunk) for chunk in chunks] + [stream.finish()]
+    return [event for event in events if event]
+
+@pytest.mark.parametrize("chunks", [
+    ["<think>plan</think>Answer"],
+    ["<th", "ink>plan</th", "ink>Answer"],
+    ["<", "t", "h", "i", "n", "k", ">", "plan", "<", "/", "think", ">", "Ans", "wer"],
+    ["<think>pl", "an</", "think>Answer"],
+])
+def test_think_tags_split_across_chunks(chunks):
+    assert run_filter(ThinkFilter(), chunks) == "Answer"
+
+def test_text_that_only_looks_like_a_tag_is_kept():
+    assert run_filter(ThinkFilter(), ["a <th", "is b <", "/b>"]) == "a <this b </b>"
+
+def test_stream_ending_inside_a_think_block_drops_it():
+    stream = ThinkFilter()
+    assert stream.feed("Before <think>still thinking</thi") == "Before "
+    assert stream.finish() == ""
+
+@pytest.mark.parametrize("chunks, expected", [
+    (["Book at L1 now"], "Book at https://example.com/1 now"),
+    (["Book at L", "1 now"], "Book at https://example.com/1 now"),
+    (["Book at ", "L", "1", " now"], "Book at https://example.com/1 now"),
+    # The stream ends on a reference
+    (["Book at L", "1"], "Book at https://example.com/1"),
+])
+def test_link_references_split_across_chunks(chunks, expected):
+    assert run_filter(LinkExpander({"L1": "https://example.com/1"}), chunks) == expected
+
+def test_reference_inside_a_word_is_not_expanded():
+    assert run_filter(LinkExpander({"L1": "https://example.com/1"}), ["X", "L1 and L", "12"]) == "XL1 and L12"
+
+def test_partial_line_waits_for_a_boundary():
+    buffer = FlushBuffer(mode="sentence", max_chars=1000, max_delay=60, clock=lambda: 0.0)
+    assert buffer.feed("The cheapest flight") is None
+    assert buffer.feed(" costs 5000") is None
+    assert buffer.feed(" INR.\n") == "The cheapest flight costs 5000 INR.\n"
+
+def test_word_mode_flushes_at_word_ends():
+    buffer = FlushBuffer(mode="word", max_chars=1000, max_delay=60, clock=lambda: 0.0)
+    assert buffer.feed("Chea") is None
+    assert buffer.feed("pest ") == "Cheapest "
+
+def test_partial_line_flushes_on_size_and_age():
+    now = [0.0]
+    buffer = FlushBuffer(mode="sentence", max_chars=10, max_delay=0.5, clock=lambda: now[0])
+    assert buffer.feed("abcdefghij") == "abcdefghij"
+    assert buffer.feed("abc") is None
+    now[0] = 1.0
+    assert buffer.feed("d") == "abcd"
+
+def test_whitespace_is_held_until_there_is_text():
+    buffer = FlushBuffer(mode="word", max_chars=1000, max_delay=60, clock=lambda: 0.0)
+    assert buffer.feed(" ") is None
+    assert buffer.flush() is None
+    assert buffer.feed("next ") == " next "
+
+def test_answer_stream_flushes_partial_line_at_finish():
+    stream = AnswerStream(links={"L1": "https://example.com/1"}, mode="sentence", max_chars=1000, max_delay=60)
+    events = run_answer(stream, ["<think>", "rows", "</think>\n\n", "Cheapest: L", "1.", " Also the", " next one"])
+    assert events == ["Cheapest: https://example.com/1.", " Also the next one"]
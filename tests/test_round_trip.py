@@ -0,0 +1,43 @@
+import pytest
+from round_trip import RoundTripIndex, RoundTripQuery, parse_round_trip
+from config import SQL_TOP_K
+
+@pytest.mark.parametrize("question, expected", [
+    ("round trip from Delhi to Hanoi with a gap of less than 10 days",
+     RoundTripQuery('New Delhi', 'Hanoi', 1, 9, SQL_TOP_K)),
+    ("round trip from Delhi to Hanoi returning exactly 7 days later",
+     RoundTripQuery('New Delhi', 'Hanoi', 7, 7, SQL_TOP_K)),
+    ("round trip from Delhi to Hanoi with at least 7 days gap",
+     RoundTripQuery('New Delhi', 'Hanoi', 7, None, SQL_TOP_K)),
+    ("Find the cheapest return flight between New Delhi and Hanoi with at least 7 days gap",
+     RoundTripQuery('New Delhi', 'Hanoi', 7, None, 1)),
+    ("Show exactly one cheapest flight from New Delhi to Hanoi and exactly one from Hanoi to New Delhi, "
+     "which should be at least 7 days later",
+     RoundTripQuery('New Delhi', 'Hanoi', 7, None, 1)),
+    ("least expensive round trip from Delhi to Hanoi", RoundTripQuery('New Delhi', 'Hanoi', 1, None, 1)),
+    ("round trip from Mumbai to Hanoi 5-10 days gap", RoundTripQuery('Mumbai', 'Hanoi', 5, 10, SQL_TOP_K)),
+])
+def test_parses(question, expected):
+    assert parse_round_trip(question) == expected
+
+@pytest.mark.parametrize("question", [
+    "most expensive round trip from Delhi to Hanoi",
+    "round trip from Delhi to Hanoi with the highest fares",
+    "round trip from Delhi to Hanoi with a gap of less than 1 day",
+    "round trip from Delhi to Hanoi 7",
+])
+def test_gives_up(question):
+    assert parse_round_trip(question) is None
+
+def test_search_pairs_cheapest_first_within_gap():
+    columns = ("origin", "destination", "date_ordinal", "airline", "date", "duration", "flightType",
+               "price_inr", "link")
+    rows = [
+        ("A", "B", 10, "X", "d10", "1h", "Nonstop", 100, "l1"),
+        ("A", "B", 12, "X", "d12", "1h", "Nonstop", 50, "l2"),
+        ("B", "A", 13, "X", "d13", "1h", "Nonstop", 10, "l3"),
+        ("B", "A", 20, "X", "d20", "1h", "Nonstop", 30, "l4"),
+    ]
+    index = RoundTripIndex(columns, rows)
+    pairs = index.search(RoundTripQuery("A", "B", 2, 8, 10))
+    assert [(pair[-2], pair[-1]) for pair in pairs] == [(8, 80), (3, 110)]
@@ -0,0 +1,24 @@
+import pytest
+import sql_cache
+from sql_cache import SQLCache
+
+@pytest.fixture
+def cache(monkeypatch):
+    monkeypatch.setattr(sql_cache, "schema_cookie", lambda: 1)
+    cache = SQLCache(path=None, max_entries=10, ttl_seconds=60, fuzzy=True, fuzzy_threshold=0.5,
+                     fingerprint=lambda: "schema")
+    cache.put("cheapest flights from Delhi to Hanoi", "SELECT 1")
+    return cache
+
+def test_fuzzy_reuses_sql_for_rephrased_question(cache):
+    assert cache.get("please show me the cheapest flights from Delhi to Hanoi") == "SELECT 1"
+    assert cache.fuzzy_hits == 1
+
+@pytest.mark.parametrize("question", [
+    "cheapest direct flights from Delhi to Hanoi",
+    "cheapest flight from Delhi to Hanoi",
+    "most expensive flights from Delhi to Hanoi",
+    "cheapest flights from Hanoi to Delhi",
+])
+def test_fuzzy_keeps_filter_words_apart(cache, question):
+    assert cache.get(question) is None
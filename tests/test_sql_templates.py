@@ -0,0 +1,49 @@
+import pytest
+from sql_templates import compile_question
+
+def where_and_order(question):
+    compiled = compile_question(question)
+    return compiled and compiled.render().split(" FROM flights WHERE ", 1)[1]
+
+@pytest.mark.parametrize("question, expected", [
+    ("flights from Delhi to Hanoi with at least 30 percent chance of rain",
+     "origin = 'New Delhi' AND destination = 'Hanoi' AND rainProbability >= 30 LIMIT 10"),
+    ("flights from Delhi to Hanoi with rain at most 30",
+     "origin = 'New Delhi' AND destination = 'Hanoi' AND rainProbability <= 30 LIMIT 10"),
+    ("flights from Delhi to Hanoi with rain up to 30 percent",
+     "origin = 'New Delhi' AND destination = 'Hanoi' AND rainProbability <= 30 LIMIT 10"),
+    ("flights from Delhi to Hanoi with rain below 30",
+     "origin = 'New Delhi' AND destination = 'Hanoi' AND rainProbability < 30 LIMIT 10"),
+    ("flights from Delhi to Hanoi with under 30% chance of rain",
+     "origin = 'New Delhi' AND destination = 'Hanoi' AND rainProbability < 30 LIMIT 10"),
+    ("low price flights from Delhi to Hanoi",
+     "origin = 'New Delhi' AND destination = 'Hanoi' ORDER BY price_inr ASC LIMIT 10"),
+    ("low fares from Delhi to Hanoi",
+     "origin = 'New Delhi' AND destination = 'Hanoi' ORDER BY price_inr ASC LIMIT 10"),
+    ("flights from Delhi to Hanoi with low rain and high price",
+     "origin = 'New Delhi' AND destination = 'Hanoi' AND rainProbability < 40 ORDER BY price_inr DESC LIMIT 10"),
+    ("least expensive flight from Delhi to Hanoi",
+     "origin = 'New Delhi' AND destination = 'Hanoi' ORDER BY price_inr ASC LIMIT 1"),
+    ("List all flights from Ho Chi Minh City to Mumbai from lowest to highest price",
+     "origin = 'Ho Chi Minh City' AND destination = 'Mumbai' ORDER BY price_inr ASC LIMIT 10"),
+])
+def test_compiles(question, expected):
+    assert where_and_order(question) == expected
+
+@pytest.mark.parametrize("question", [
+    # Comparison missing: "30 percent chance" is not a threshold
+    "flights from Delhi to Hanoi with 30 percent chance of rain",
+    # A stop is not a flight type filter the template can express
+    "flights from Delhi to Hanoi with one stop",
+    "flights from Delhi to Hanoi with a stop",
+    # 'least'/'lowest'/'best' outside a price phrase
+    "flights from Delhi to Hanoi with at least 30 stops",
+    "lowest flights from Delhi to Hanoi",
+    "best flights from Delhi to Hanoi",
+    "cheapest and most expensive flights from Delhi to Hanoi",
+    # A price ceiling is not a rain threshold just because rain is mentioned
+    "flights from Delhi to Hanoi under 20000 with rain",
+    "cheap flights from Delhi to Hanoi under 15000 in rainy weather",
+])
+def test_gives_up(question):
+    assert compile_question(question) is None
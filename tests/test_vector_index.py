@@ -0,0 +1,12 @@
+import numpy as np
+from vector_index import VectorIndex, normalize_rows
+
+def test_searches_normalized_matrices_in_place():
+    indigo = normalize_rows(np.array([[1, 0], [1, 1]], dtype=np.float32))
+    vietjet = np.array([[0, 3]], dtype=np.float32)
+    index = VectorIndex([("IndiGo", ["a", "b"], indigo), ("VietJet Air", ["c"], vietjet)])
+
+    assert index._airlines["IndiGo"][1] is indigo
+    assert [chunk for chunk, _, _ in index.search([1, 0.1], k=2, airline="IndiGo")] == ["a", "b"]
+    assert [chunk for chunk, _, _ in index.search([0, 1], k=3)] == ["c", "b", "a"]
+    assert index.search([0, 1], airline="Air India") == []